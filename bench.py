@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+#  kirmah/bench.py
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  software  : Kirmah    <http://kirmah.sourceforge.net/>
+#  version   : 2.18
+#  date      : 2013
+#  licence   : GPLv3.0   <http://www.gnu.org/licenses/>
+#  author    : a-Sansara <[a-sansara]at[clochardprod]dot[net]>
+#  copyright : pluie.org <http://www.pluie.org/>
+#
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  This file is part of Kirmah.
+#
+#  Kirmah is free software (free as in speech) : you can redistribute it
+#  and/or modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the License,
+#  or (at your option) any later version.
+#
+#  Kirmah is distributed in the hope that it will be useful, but WITHOUT
+#  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#  more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Kirmah.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ module bench ~~
+
+from binascii           import b2a_base64
+from os                 import urandom
+from os.path            import join
+from tempfile           import mkdtemp
+from time               import perf_counter
+from shutil             import rmtree
+from kirmah.crypt       import Kirmah, KeyGen, np
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ methods ~~
+
+def timeit(fn, *args, **kwargs):
+    """Get elapsed seconds of calling `fn`
+    :Returns: `float`
+    """
+    t = perf_counter()
+    fn(*args, **kwargs)
+    return perf_counter() - t
+
+
+def report(title, size, elapsed):
+    """Print throughput of a benchmark step"""
+    print(' '*4+title.ljust(40,' ')+('%.3f s' % elapsed).rjust(12,' ')+('%.2f MB/s' % (size/1048576/elapsed if elapsed > 0 else 0)).rjust(16,' '))
+
+
+def bench_cipher(size=4194304, klen=1024):
+    """Compare the char loop of encryptToFile with the cipher engines"""
+    key, tmp = KeyGen(klen).key, mkdtemp()
+    src, dst = join(tmp, 'src'), join(tmp, 'dst')
+    try :
+        print('cipher ('+str(size)+' bytes) :')
+        with open(src, 'wb') as f : f.write(b2a_base64(urandom(size*3//4)))
+        report('char loop (v2)', size, timeit(Kirmah(key).encryptToFile, src, dst))
+        if np is not None :
+            report('numpy (v2)', size, timeit(Kirmah(key, engine=Kirmah.ENGINE_NUMPY).encryptToFile, src, dst))
+        with open(src, 'wb') as f : f.write(urandom(size))
+        for engine in (Kirmah.ENGINE_CHAR, Kirmah.ENGINE_TABLE, Kirmah.ENGINE_NUMPY) :
+            if engine != Kirmah.ENGINE_NUMPY or np is not None :
+                report(engine+' (v3 bytes)', size, timeit(Kirmah(key, engine=engine, bytemode=True).encryptToFile, src, dst))
+    finally :
+        rmtree(tmp, True)
+
+
+def bench_chunks(size=4194304, klen=1024):
+    """Compare I/O throughput of the random mode per chunk policy"""
+    key, tmp = KeyGen(klen).key, mkdtemp()
+    src, rdm, dst = join(tmp, 'src'), join(tmp, 'rdm'), join(tmp, 'dst')
+    try :
+        print('chunks ('+str(size)+' bytes) :')
+        with open(src, 'wb') as f : f.write(urandom(size))
+        for policy in Kirmah.CHUNK_POLICIES :
+            km = Kirmah(key, bytemode=True, chpolicy=policy)
+            report(policy+' random', size, timeit(km.randomFileContent, src, rdm, False))
+            report(policy+' unrandom', size, timeit(km.unRandomFileContent, rdm, dst, False))
+    finally :
+        rmtree(tmp, True)
+
+
+def bench_mix(size=4194304, klen=1024):
+    """Compare throughput of mix mode per part count and input size"""
+    key, tmp = KeyGen(klen).key, mkdtemp()
+    src, mix, dst = join(tmp, 'src'), join(tmp, 'mix'), join(tmp, 'dst')
+    try :
+        km = Kirmah(key, bytemode=True)
+        for fsize in (size//16, size//4, size) :
+            print('mix ('+str(fsize)+' bytes, adaptive : '+str(km.getMixParts(fsize))+' parts) :')
+            with open(src, 'wb') as f : f.write(urandom(fsize))
+            for cpart in (Kirmah.MIX_PARTS_MIN, Kirmah.MIX_PARTS, 32, Kirmah.MIX_PARTS_MAX) :
+                report(str(cpart)+' parts mix', fsize, timeit(km.mixdata, src, mix, False, cpart=cpart, emit=False))
+                report(str(cpart)+' parts unmix', fsize, timeit(km.unmixdata, mix, dst, cpart=cpart, emit=False))
+            for nproc in (2, 4) :
+                report(str(Kirmah.MIX_PARTS)+' parts mix (-j '+str(nproc)+')', fsize, timeit(km.mixdata, src, mix, False, cpart=Kirmah.MIX_PARTS, nproc=nproc, emit=False))
+                report(str(Kirmah.MIX_PARTS)+' parts unmix (-j '+str(nproc)+')', fsize, timeit(km.unmixdata, mix, dst, cpart=Kirmah.MIX_PARTS, nproc=nproc, emit=False))
+    finally :
+        rmtree(tmp, True)
+
+
+if __name__ == '__main__':
+    import sys
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4194304
+    bench_cipher(size)
+    bench_chunks(size)
+    bench_mix(size)
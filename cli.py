@@ -36,6 +36,7 @@ from    psr.sys         import Sys, Io, Const, init
 from    psr.log         import Log
 from    psr.cli         import AbstractCli
 from    kirmah.cliapp   import CliApp
+from    kirmah.crypt    import CACHE
 import  kirmah.conf     as conf
 
 
@@ -66,9 +67,16 @@ class Cli(AbstractCli):
         gpData.add_option('-m', '--mix'           , action='store_true' )
         gpData.add_option('-M', '--nomix'         , action='store_true' )
         gpData.add_option('-j', '--multiprocess'  , action='store')
+        gpData.add_option('-e', '--engine'        , action='store')
+        gpData.add_option('-b', '--bytemode'      , action='store_true' )
+        gpData.add_option('-c', '--codec'         , action='store')
+        gpData.add_option('-C', '--cache'         , action='store_true' )
+        gpData.add_option('-B', '--membudget'     , action='store')
+        gpData.add_option('-s', '--chunkpolicy'   , action='store')
         gpData.add_option('-k', '--keyfile'       , action='store')
         gpData.add_option('-l', '--length'        , action='store', default=1024)
         gpData.add_option('-p', '--parts'         , action='store', default=22)
+        gpData.add_option('-P', '--part-size'     , action='store', dest='partsize')
         gpData.add_option('-o', '--outputfile'    , action='store')
         self.parser.add_option_group(gpData)
 
@@ -107,6 +115,7 @@ class Cli(AbstractCli):
             elif a[0] in ['key','enc','dec','split','merge'] :
 
                 app = CliApp(self.HOME, path, self, a, o)
+                if o.cache : CACHE.setPath(self.DIRKEY+'cache')
 
                 if a[0]=='key'  :
                     app.onCommandKey()
@@ -121,6 +130,9 @@ class Cli(AbstractCli):
                     elif a[0]=='split': app.onCommandSplit()
                     elif a[0]=='merge': app.onCommandMerge()
 
+                    if Sys.g.DEBUG :
+                        Sys.print(' '*5+'cache hit rate : %.1f%% (%d hits, %d miss)' % (CACHE.getHitRate()*100, CACHE.hits, CACHE.miss), Sys.Clz.fgB1, True)
+
                     Sys.dprint('PUT END SIGNAL')
                     if Sys.g.LOG_QUEUE is not None :
                         Sys.g.LOG_QUEUE.put(Sys.g.SIGNAL_STOP)
@@ -167,10 +179,22 @@ class Cli(AbstractCli):
         Sys.print('inputFile'                  , Sys.CLZ_HELP_PARAM, False)
         Sys.print('} '                         , Sys.CLZ_HELP_PARAM, False)
         Sys.print('['                          , Sys.CLZ_HELP_ARG, False)
-        Sys.print(' -z|Z|a -r|R -m|M -j '      , Sys.CLZ_HELP_ARG, False)
+        Sys.print(' -z|Z|a -r|R -m|M -b -j '   , Sys.CLZ_HELP_ARG, False)
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('numProcess'                 , Sys.CLZ_HELP_PARAM, False)
         Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -e '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('engine'                     , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -c '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('codec'                      , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -s '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('policy'                     , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print(' -k '                       , Sys.CLZ_HELP_ARG, False)
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('keyFile'                    , Sys.CLZ_HELP_PARAM, False)
@@ -191,6 +215,10 @@ class Cli(AbstractCli):
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('numProcess'                 , Sys.CLZ_HELP_PARAM, False)
         Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -e '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('engine'                     , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print(' -k '                       , Sys.CLZ_HELP_ARG, False)
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('keyFile'                    , Sys.CLZ_HELP_PARAM, False)
@@ -211,6 +239,14 @@ class Cli(AbstractCli):
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('numParts'                   , Sys.CLZ_HELP_PARAM, False)
         Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -P '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('partSize'                   , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -j '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('numProcess'                 , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print(' -k '                       , Sys.CLZ_HELP_ARG, False)
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('keyFile'                    , Sys.CLZ_HELP_PARAM, False)
@@ -227,6 +263,10 @@ class Cli(AbstractCli):
         Sys.print('inputFile'                  , Sys.CLZ_HELP_PARAM, False)
         Sys.print('} '                         , Sys.CLZ_HELP_PARAM, False)
         Sys.print('['                          , Sys.CLZ_HELP_ARG, False)
+        Sys.print(' -j '                       , Sys.CLZ_HELP_ARG, False)
+        Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('numProcess'                 , Sys.CLZ_HELP_PARAM, False)
+        Sys.print('}'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print(' -k '                       , Sys.CLZ_HELP_ARG, False)
         Sys.print('{'                          , Sys.CLZ_HELP_PARAM, False)
         Sys.print('keyFile'                    , Sys.CLZ_HELP_PARAM, False)
@@ -253,6 +293,8 @@ class Cli(AbstractCli):
         Sys.print(' '*50+'force rewriting existing files without alert'      , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-q'.ljust(13,' ')+', --quiet'                       , Sys.CLZ_HELP_ARG)
         Sys.print(' '*50+'don\'t print status messages to stdout'            , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-C'.ljust(13,' ')+', --cache'                       , Sys.CLZ_HELP_ARG)
+        Sys.print(' '*50+'keep chunks permutations in ~/.kirmah/cache'       , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-h'.ljust(13,' ')+', --help'                        , Sys.CLZ_HELP_ARG)
         Sys.print(' '*50+'display help'                                      , Sys.CLZ_HELP_ARG_INFO)
 
@@ -285,11 +327,33 @@ class Cli(AbstractCli):
         Sys.print(' '*50+'enable mix mode'                                   , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-M'.ljust(13,' ')+', --nomix'                       , Sys.CLZ_HELP_ARG)
         Sys.print(' '*50+'disable mix mode'                                  , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-b'.ljust(13,' ')+', --bytemode'                    , Sys.CLZ_HELP_ARG)
+        Sys.print(' '*50+'enable byte cipher (same size output, version 3)'  , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-j '                                                , Sys.CLZ_HELP_ARG, False)
         Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM, False)
         Sys.print(', --multiprocess'.ljust(18,' ')                           , Sys.CLZ_HELP_ARG, False)
         Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM)
         Sys.print(' '*50+'number of process for encryption (2 to 8)'         , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-e '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('ENGINE'.ljust(10,' ')                                     , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --engine'.ljust(18,' ')                                 , Sys.CLZ_HELP_ARG, False)
+        Sys.print('ENGINE'.ljust(10,' ')                                     , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'cipher engine (char, numpy or table)'              , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-c '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('CODEC'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --codec'.ljust(18,' ')                                  , Sys.CLZ_HELP_ARG, False)
+        Sys.print('CODEC'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'compression codec[:level] (zlib, lzma, bz2 or none)', Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-B '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('SIZE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --membudget'.ljust(18,' ')                              , Sys.CLZ_HELP_ARG, False)
+        Sys.print('SIZE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'memory budget of random mode (ex: 512M)'           , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-s '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('POLICY'.ljust(10,' ')                                     , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --chunkpolicy'.ljust(18,' ')                            , Sys.CLZ_HELP_ARG, False)
+        Sys.print('POLICY'.ljust(10,' ')                                     , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'chunk size policy of random mode (legacy or aligned)', Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-k '                                                , Sys.CLZ_HELP_ARG, False)
         Sys.print('FILE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
         Sys.print(', --keyfile'.ljust(18,' ')                                , Sys.CLZ_HELP_ARG, False)
@@ -308,6 +372,16 @@ class Cli(AbstractCli):
         Sys.print(', --multiprocess'.ljust(18,' ')                           , Sys.CLZ_HELP_ARG, False)
         Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM)
         Sys.print(' '*50+'number of process for decryption (2 to 8)'         , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-e '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('ENGINE'.ljust(10,' ')                                     , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --engine'.ljust(18,' ')                                 , Sys.CLZ_HELP_ARG, False)
+        Sys.print('ENGINE'.ljust(10,' ')                                     , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'cipher engine (char, numpy or table)'              , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-B '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('SIZE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --membudget'.ljust(18,' ')                              , Sys.CLZ_HELP_ARG, False)
+        Sys.print('SIZE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'memory budget of random mode (ex: 512M)'           , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-k '                                                , Sys.CLZ_HELP_ARG, False)
         Sys.print('FILE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
         Sys.print(', --keyfile'.ljust(18,' ')                                , Sys.CLZ_HELP_ARG, False)
@@ -325,7 +399,17 @@ class Cli(AbstractCli):
         Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM, False)
         Sys.print(', --part'.ljust(18,' ')                                   , Sys.CLZ_HELP_ARG, False)
         Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM)
-        Sys.print(' '*50+'count part to split'                               , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*50+'count part to split (12 to 62)'                    , Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-P '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('SIZE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --part-size'.ljust(18,' ')                              , Sys.CLZ_HELP_ARG, False)
+        Sys.print('SIZE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'size of parts to split, instead of count (ex: 64M)', Sys.CLZ_HELP_ARG_INFO)
+        Sys.print(' '*4+'-j '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --multiprocess'.ljust(18,' ')                           , Sys.CLZ_HELP_ARG, False)
+        Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'number of process for splitting (2 to 8)'          , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-k '                                                , Sys.CLZ_HELP_ARG, False)
         Sys.print('FILE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
         Sys.print(', --keyfile'.ljust(18,' ')                                , Sys.CLZ_HELP_ARG, False)
@@ -339,6 +423,11 @@ class Cli(AbstractCli):
 
         Sys.dprint('\n')
         Sys.print('  MERGE OPTIONS :\n'                                      , Sys.CLZ_HELP_CMD)
+        Sys.print(' '*4+'-j '                                                , Sys.CLZ_HELP_ARG, False)
+        Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM, False)
+        Sys.print(', --multiprocess'.ljust(18,' ')                           , Sys.CLZ_HELP_ARG, False)
+        Sys.print('COUNT'.ljust(10,' ')                                      , Sys.CLZ_HELP_PARAM)
+        Sys.print(' '*50+'number of process for merging (2 to 8)'            , Sys.CLZ_HELP_ARG_INFO)
         Sys.print(' '*4+'-k '                                                , Sys.CLZ_HELP_ARG, False)
         Sys.print('FILE'.ljust(10,' ')                                       , Sys.CLZ_HELP_PARAM, False)
         Sys.print(', --keyfile'.ljust(18,' ')                                , Sys.CLZ_HELP_ARG, False)
@@ -448,6 +537,13 @@ class Cli(AbstractCli):
         Sys.print(' -o ' , Sys.CLZ_HELP_ARG, False)
         Sys.print('myBigBinaryFile.encrypted', Sys.CLZ_HELP_PARAM)
 
+        Sys.print(' '*8+'# split specified file on parts of 64M with default crypted key', Sys.CLZ_HELP_COMMENT)
+        Sys.print(' '*8+conf.PRG_CLI_NAME+' ', Sys.CLZ_HELP_PRG, False)
+        Sys.print('split ', Sys.CLZ_HELP_CMD, False)
+        Sys.print('myBigDiskImage.img', Sys.CLZ_HELP_PARAM, False)
+        Sys.print(' -P ' , Sys.CLZ_HELP_ARG, False)
+        Sys.print('64M'  , Sys.CLZ_HELP_PARAM)
+
 
         Cli.printLineSep(Const.LINE_SEP_CHAR,Const.LINE_SEP_LEN)
         Sys.print('\n'+' '*4+'command merge :', Sys.CLZ_HELP_CMD)
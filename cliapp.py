@@ -32,7 +32,7 @@
 # ~~ module cliapp ~~
 
 import  kirmah.conf     as conf
-from    kirmah.crypt    import KirmahHeader, Kirmah, BadKeyException, represents_int, KeyGen
+from    kirmah.crypt    import KirmahHeader, Kirmah, BadKeyException, represents_int, KeyGen, Codec, parse_size
 from    psr.sys         import Sys, Const, Io
 from    psr.log         import Log
 import  tarfile
@@ -95,6 +95,14 @@ class CliApp:
         compress = (KirmahHeader.COMP_END if d == 0 or (d is None and Io.is_binary(self.a[1])) else (KirmahHeader.COMP_ALL if d==1 or d is None else KirmahHeader.COMP_NONE))
         random   = True if (self.o.random is None and self.o.norandom is None) or self.o.random else False
         mix      = True if (self.o.mix is None and self.o.nomix is None) or self.o.mix else False
+        codec    = self.getCodec()
+        probe    = None
+        if codec is not None and Codec.parse(codec)[0] == Codec.NONE :
+            compress, codec = KirmahHeader.COMP_NONE, None
+        elif d is None and codec is None :
+            pd              = Sys.datetime.now()
+            probe           = Kirmah.probeCompress(self.a[1], bool(self.o.bytemode))
+            compress, codec = probe['cmode'], probe['codec']
 
         if (self.o.multiprocess is not None and not represents_int(self.o.multiprocess)) or (not self.o.multiprocess is None and not(int(self.o.multiprocess)>=2 and int(self.o.multiprocess) <=8)) :
             self.parser.error_cmd((('invalid option ',('-j, --multiprocess', Sys.Clz.fgb3), ' value (', ('2',Sys.Clz.fgb3),' to ', ('8',Sys.Clz.fgb3),')'),))
@@ -112,9 +120,12 @@ class CliApp:
 
             try :
                 Sys.ptask()
+                if probe is not None :
+                    mode = { KirmahHeader.COMP_NONE:'none', KirmahHeader.COMP_END:'end', KirmahHeader.COMP_ALL:'full' }[compress]
+                    Sys.pstep('Probing compression (entropy %.2f bits/byte, ratio %.2f : %s%s)' % (probe['entropy'], probe['ratio'], mode, '' if codec is None else ' '+codec), pd, True)
 
                 key    = Io.get_data(self.o.keyfile)
-                km     = Kirmah(key, None, compress, random, mix)
+                km     = Kirmah(key, None, compress, random, mix, self.getEngine(), bool(self.o.bytemode), codec, self.getMemBudget(), self.getChunkPolicy())
 
                 km.encrypt(self.a[1], self.o.outputfile, nproc)
 
@@ -154,7 +165,7 @@ class CliApp:
                 Sys.ptask()
 
                 key    = Io.get_data(self.o.keyfile)
-                km     = Kirmah(key)
+                km     = Kirmah(key, engine=self.getEngine(), membudget=self.getMemBudget())
 
                 km.decrypt(self.a[1], self.o.outputfile, nproc)
 
@@ -175,6 +186,19 @@ class CliApp:
             self.parser.error_cmd((('invalid option ',('-p, --parts', Sys.Clz.fgb3), ' value (', ('12',Sys.Clz.fgb3),' to ', ('62',Sys.Clz.fgb3),')'),))
         else : self.o.parts = int(self.o.parts)
 
+        if self.o.partsize is not None :
+            try :
+                psize = parse_size(self.o.partsize)
+            except ValueError :
+                psize = 0
+            if psize < Kirmah.BLOCK_SIZE :
+                self.parser.error_cmd((('invalid option ',('-P, --part-size', Sys.Clz.fgb3), ' value (', ('1M',Sys.Clz.fgb3),' minimum)'),))
+
+        if (self.o.multiprocess is not None and not represents_int(self.o.multiprocess)) or (not self.o.multiprocess is None and not(int(self.o.multiprocess)>=2 and int(self.o.multiprocess) <=8)) :
+            self.parser.error_cmd((('invalid option ',('-j, --multiprocess', Sys.Clz.fgb3), ' value (', ('2',Sys.Clz.fgb3),' to ', ('8',Sys.Clz.fgb3),')'),))
+
+        nproc = int(self.o.multiprocess) if not self.o.multiprocess is None and int(self.o.multiprocess)>=2 and int(self.o.multiprocess) <=8 else 1
+
         if not Sys.g.QUIET : self.parser.print_header()
         if self.o.outputfile is not None :
             if self.o.outputfile[-5:]!='.tark' : self.o.outputfile += '.tark'
@@ -190,40 +214,29 @@ class CliApp:
                 Sys.cli_emit_progress(2)
                 key    = Io.get_data(self.o.keyfile)
                 km     = Kirmah(key)
-                hlst   = km.ck.getHashList(Sys.basename(self.a[1]), self.o.parts, True)
+                # part size overrides the part count
+                parts  = self.o.parts if self.o.partsize is None else km.getSplitCount(Sys.getsize(self.a[1]), psize)
+                hlst   = km.ck.getHashList(Sys.basename(self.a[1]), parts, True)
                 Sys.cli_emit_progress(3)
-                kcf    = km.splitFile(self.a[1], hlst)
                 t      = int(Sys.time())
-                times  = (t,t)
-                p      = 85
-                Sys.cli_emit_progress(p)
-                Io.touch(kcf, times)
-                frav = 0.24
-                for row in hlst['data']:
-                    p += frav
-                    Io.touch(row[1]+km.EXT,times)
-                    Sys.cli_emit_progress(p)
                 if self.o.outputfile is not None :
+                    # parts are streamed to the tark file, no part file is written
                     d = Sys.datetime.now()
                     if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                     Sys.ptask('Preparing tark file')
-                    hlst['data'] = sorted(hlst['data'], key=lambda lst: lst[4])
-                    with tarfile.open(self.o.outputfile, mode='w') as tar:
-                        tar.add(kcf, arcname=Sys.basename(kcf))
-                        p    = 90
-                        for row in hlst['data']:
-                            tar.add(row[1]+km.EXT, arcname=Sys.basename(row[1]+km.EXT))
-                            p += frav
-                            Sys.cli_emit_progress(p)
+                    km.splitTar(self.a[1], hlst, self.o.outputfile, nproc, t)
                     Sys.pstep('Packing destination file', d, True)
-                    d = Sys.datetime.now()
-                    Sys.ptask('Finalize')
+                else :
+                    kcf    = km.splitFile(self.a[1], hlst, nproc)
+                    times  = (t,t)
+                    p      = 85
+                    Sys.cli_emit_progress(p)
+                    Io.touch(kcf, times)
+                    frav = 0.24
                     for row in hlst['data']:
-                        Io.removeFile(row[1]+km.EXT)
                         p += frav
+                        Io.touch(row[1]+km.EXT,times)
                         Sys.cli_emit_progress(p)
-                    Io.removeFile(kcf)
-                    Sys.pstep('Cleaning', d, True)
 
             except Exception as e :
                 done = False
@@ -246,6 +259,11 @@ class CliApp:
         """"""
         done   = True
 
+        if (self.o.multiprocess is not None and not represents_int(self.o.multiprocess)) or (not self.o.multiprocess is None and not(int(self.o.multiprocess)>=2 and int(self.o.multiprocess) <=8)) :
+            self.parser.error_cmd((('invalid option ',('-j, --multiprocess', Sys.Clz.fgb3), ' value (', ('2',Sys.Clz.fgb3),' to ', ('8',Sys.Clz.fgb3),')'),))
+
+        nproc = int(self.o.multiprocess) if not self.o.multiprocess is None and int(self.o.multiprocess)>=2 and int(self.o.multiprocess) <=8 else 1
+
         if not Sys.g.QUIET : self.parser.print_header()
 
         if done :
@@ -255,32 +273,13 @@ class CliApp:
 
                 key    = Io.get_data(self.o.keyfile)
                 km     = Kirmah(key)
-                kcf    = None
-                istar  = True
-                try:
-                    import tarfile
-                    dpath = Sys.dirname(Sys.realpath(self.o.outputfile))+Sys.sep if self.o.outputfile is not None else Sys.dirname(Sys.realpath(self.a[1]))+Sys.sep
+                if tarfile.is_tarfile(self.a[1]) :
+                    # parts are read from the tark members, nothing is extracted
                     if self.o.outputfile is None :
-                        self.o.outputfile = dpath
-                    with tarfile.open(self.a[1], mode='r') as tar:
-                        #~ print(dpath)
-                        tar.extractall(path=dpath)
-                        kcf = None
-                        for tarinfo in tar:
-                            #~ print(tarinfo.name)
-                            if tarinfo.isreg() and tarinfo.name[-4:]=='.kcf':
-                                #~ print(dpath+tarinfo.name)
-                                kcf = dpath+tarinfo.name
-                    if kcf is not None :
-                        km.DIR_OUTBOX = dpath
-                        toPath = km.mergeFile(kcf, self.o.outputfile)
-                except BadKeyException:
-                    Sys.pwarn((('BadKeyException : ',('wrong key ',Sys.CLZ_WARN_PARAM), ' !'),), False)
-                    done = False
-
-                except Exception :
-                    istar  = False
-                    toPath = km.mergeFile(self.a[1], self.o.outputfile)
+                        self.o.outputfile = Sys.dirname(Sys.realpath(self.a[1]))+Sys.sep
+                    toPath = km.mergeTar(self.a[1], self.o.outputfile, nproc=nproc)
+                else :
+                    toPath = km.mergeFile(self.a[1], self.o.outputfile, nproc=nproc)
 
                 #~ if self.o.outputfile is not None :
                 #~ Io.rename(toPath, self.o.outputfile)
@@ -296,16 +295,56 @@ class CliApp:
                     print(e)
                 elif not Sys.g.QUIET :
                     Sys.pwarn((str(e),))
-        if not done :
-            if istar :
-                with tarfile.open(self.a[1], mode='r') as tar:
-                    for tarinfo in tar:
-                        Sys.removeFile(dpath+tarinfo.name)
-
         if not Sys.g.QUIET :
             self.onend_cmd('Kirmah Merge', self.stime, done, toPath)
 
 
+    @Log(Const.LOG_DEBUG)
+    def getEngine(self):
+        """"""
+        engine = self.o.engine
+        if engine is not None and engine not in Kirmah.ENGINES :
+            self.parser.error_cmd((('invalid option ',('-e, --engine', Sys.Clz.fgb3), ' value (', ('char',Sys.Clz.fgb3),', ', ('numpy',Sys.Clz.fgb3),' or ', ('table',Sys.Clz.fgb3),')'),))
+        if engine is not None and Kirmah.getEngine(engine) != engine :
+            Sys.pwarn((('numpy is not available, using ',('default', Sys.Clz.fgb3), ' engine !'),), False)
+        return Kirmah.getEngine(engine)
+
+
+    @Log(Const.LOG_DEBUG)
+    def getMemBudget(self):
+        """"""
+        budget = None
+        if self.o.membudget is not None :
+            try :
+                budget = parse_size(self.o.membudget)
+            except ValueError :
+                budget = 0
+            if budget < Kirmah.BLOCK_SIZE :
+                self.parser.error_cmd((('invalid option ',('-B, --membudget', Sys.Clz.fgb3), ' value (', ('1M',Sys.Clz.fgb3),' minimum)'),))
+        return budget
+
+
+    @Log(Const.LOG_DEBUG)
+    def getChunkPolicy(self):
+        """"""
+        policy = self.o.chunkpolicy
+        if policy is not None and policy not in Kirmah.CHUNK_POLICIES :
+            self.parser.error_cmd((('invalid option ',('-s, --chunkpolicy', Sys.Clz.fgb3), ' value (', ('legacy',Sys.Clz.fgb3),' or ', ('aligned',Sys.Clz.fgb3),')'),))
+        return policy
+
+
+    @Log(Const.LOG_DEBUG)
+    def getCodec(self):
+        """"""
+        codec = self.o.codec
+        if codec is not None :
+            try :
+                Codec.parse(codec)
+            except ValueError as e :
+                self.parser.error_cmd((('invalid option ',('-c, --codec', Sys.Clz.fgb3), ' value (', (str(e),Sys.Clz.fgb3),')'),))
+        return codec
+
+
     @Log(Const.LOG_ALL)
     def getDefaultOption(self, args):
         """"""
@@ -33,16 +33,53 @@
 
 from base64             import urlsafe_b64encode, b64decode
 from binascii           import b2a_base64, a2b_base64
+from zlib               import compressobj, decompressobj, DEFLATED
 from hashlib            import sha256, md5
+from hmac               import new as hmac, compare_digest
 from math               import log, floor, ceil
-from random             import choice
-from os                 import urandom
+from bisect             import bisect_right
+from random             import choice, randrange
+from os                 import urandom, listdir, chmod
+from os.path            import getmtime
 from re                 import sub
-from mmap               import mmap
+from mmap               import mmap, ACCESS_READ
 from ast                import literal_eval
+from io                 import BytesIO
+import tarfile
+from codecs             import getincrementaldecoder
+from collections        import deque, Counter, OrderedDict
+from itertools          import islice
+from threading          import Thread, Event, Lock
+from queue              import Queue, Full
+from multiprocessing    import get_context
+from concurrent.futures import ThreadPoolExecutor, Future
 from psr.sys            import Sys, Io, Const
 from psr.log            import Log
 from psr.mproc          import Manager
+try :
+    import numpy as np
+except ImportError :
+    np = None
+try :
+    import lzma
+except ImportError :
+    lzma = None
+try :
+    import bz2
+except ImportError :
+    bz2 = None
+try :
+    from os import copy_file_range
+except ImportError :
+    copy_file_range = None
+try :
+    from os import sendfile
+except ImportError :
+    sendfile = None
+try :
+    from os import pread, pwrite
+except ImportError :
+    pread, pwrite = None, None
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~ methods ~~
@@ -80,6 +117,40 @@ def randomFrom(val, sval=0):
     return choice(lst)
 
 
+@Log(Const.LOG_ALL)
+def readable_size(size):
+    """Get a human readable str of bytes count `size`
+    :Returns: `str`
+    """
+    for unit in ('B','KB','MB','GB') :
+        if abs(size) < 1024 : break
+        size /= 1024
+    else : unit = 'TB'
+    return ('%d ' % size if unit == 'B' else '%.2f ' % size) + unit
+
+
+@Log(Const.LOG_ALL)
+def parse_size(size):
+    """Get bytes count of a size str like '512', '64K', '512M' or '2G'
+    :Returns: `int`
+    """
+    size = str(size).strip().upper()
+    mult = { 'K':1024, 'M':1024**2, 'G':1024**3, 'T':1024**4 }.get(size[-1:], 1)
+    if mult > 1 : size = size[:-1]
+    return int(float(size)*mult)
+
+
+_mproc_km = None
+"""Kirmah instance shared by forked workers of cipherBlocksMproc"""
+
+def _mproc_cipher_block(data, i, decrypt):
+    """Pool worker of cipherBlocksMproc (no Log decorator, as a pool
+    function must be picklable by name)
+    :Returns: `bytes`
+    """
+    return _mproc_km.cipherBlock(data, i, decrypt)
+
+
 @Log(Const.LOG_NEVER)
 def represents_int(s):
     """"""
@@ -162,13 +233,16 @@ class ConfigKey:
         self.psize  = psize
         self.noiser = Noiser(self.key)
         self.rdmz   = Randomiz(1)
+        self.kid    = sha256(self.key).hexdigest()[:24]
 
 
     @staticmethod
     @Log(Const.LOG_ALL)
     def sumNumber(s,count):
-        """"""
-        return sum([ int(c) for j,c in enumerate(s) if represents_int(c)][0:count])
+        """Get the sum of the `count` first digits of `s`
+        :Returns: `int`
+        """
+        return sum(islice((int(c) for c in s if c.isdigit()), count))
 
 
     @Log(Const.LOG_DEBUG)
@@ -176,15 +250,9 @@ class ConfigKey:
         """"""
         self.rdmz.new(count)
         dic, lst, hroot = {}, [], hash_sha256(self.salt+name)
-
-        srdl = Kirmah.getRandomListFromKey(self.key, count)
-        #~ srdl = getRandomListFromKey(self.key, count)
-        for i in range(count) :
-            self.noiser.build(i,ConfigKey.sumNumber(hash_sha256(str(i)+self.salt+name),1 if i%2 else 2))
-            d     = str(i).rjust(2,'0')
-            # part n°, hash, lns, lne, pos
-            hpart = hash_sha256(self.salt+name+'.part'+d)[:-3]+str(ord(hroot[i])).rjust(3,'0')
-            lst.append((i, hpart, self.noiser.lns, self.noiser.lne, self.rdmz.get(), srdl[i]))
+        # key dependant rows are cached, random order (pos) is not
+        for row in CACHE.get(('hash', self.kid, name, count), lambda : self.getHashRows(name, count, hroot), self.key) :
+            lst.append(row[:4]+(self.rdmz.get(),)+row[4:])
         dic['head'] = [name,count,hroot,self.getKey()]
         if not noSorted :
             lst = sorted(lst, key=lambda lst: lst[4])
@@ -192,6 +260,23 @@ class ConfigKey:
         return dic
 
 
+    @Log(Const.LOG_DEBUG)
+    def getHashRows(self, name, count, hroot):
+        """Get rows of getHashList without random order
+        :Returns: `list`
+        """
+        lst  = []
+        srdl = Kirmah.getRandomListFromKey(self.key, count)
+        for i in range(count) :
+            self.noiser.build(i,ConfigKey.sumNumber(hash_sha256(str(i)+self.salt+name),1 if i%2 else 2))
+            d     = str(i).rjust(2,'0')
+            # part n°, hash, lns, lne, [pos,] index
+            # hroot is wrapped beyond 64 parts, so smaller lists are unchanged
+            hpart = hash_sha256(self.salt+name+'.part'+d)[:-3]+str(ord(hroot[i%len(hroot)])).rjust(3,'0')
+            lst.append((i, hpart, self.noiser.lns, self.noiser.lne, srdl[i]))
+        return lst
+
+
     @Log(Const.LOG_PRIVATE)
     def _build(self,l=48):
         """"""
@@ -207,7 +292,71 @@ class ConfigKey:
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-# ~~ class Kirmah ~~
+# ~~ class Codec ~~
+
+class Codec:
+    """Compression codecs registry, a codec is given as 'name' or
+    'name:level'"""
+
+    ZLIB    = 'zlib'
+    LZMA    = 'lzma'
+    BZ2     = 'bz2'
+    NONE    = 'none'
+    DEFAULT = ZLIB
+    LEVELS  = { ZLIB:(0, 9, 9), LZMA:(0, 9, 6), BZ2:(1, 9, 9), NONE:(0, 0, 0) }
+    """min, max and default level of each codec"""
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def available(name):
+        """"""
+        return name in Codec.LEVELS and not (name == Codec.LZMA and lzma is None or name == Codec.BZ2 and bz2 is None)
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def parse(codec=None):
+        """Get name and level of `codec`
+        :Returns: `tuple`
+        """
+        if codec is None : return Codec.DEFAULT, Codec.LEVELS[Codec.DEFAULT][2]
+        name, sep, lvl = str(codec).partition(':')
+        if not Codec.available(name) :
+            raise ValueError('unavailable codec '+name)
+        lmin, lmax, ldef = Codec.LEVELS[name]
+        lvl = int(lvl) if sep else ldef
+        if not lmin <= lvl <= lmax :
+            raise ValueError('invalid level '+str(lvl)+' for codec '+name)
+        return name, lvl
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def compressor(name, lvl):
+        """Get a compressor object of codec `name`, gzip container for zlib
+        :Returns: `object`
+        """
+        if name == Codec.LZMA : return lzma.LZMACompressor(preset=lvl)
+        elif name == Codec.BZ2 : return bz2.BZ2Compressor(lvl)
+        return compressobj(lvl, DEFLATED, 31)
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def decompressor(name):
+        """Get a decompressor object of codec `name`, gzip or zlib container
+        for zlib
+        :Returns: `object`
+        """
+        if name == Codec.LZMA : return lzma.LZMADecompressor()
+        elif name == Codec.BZ2 : return bz2.BZ2Decompressor()
+        return decompressobj(47)
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ class KirmahHeader ~~
 
 class KirmahHeader:
 
@@ -215,18 +364,26 @@ class KirmahHeader:
     COMP_ALL         = 1
     COMP_END         = 2
 
+    VERS_CHAR        = 2
+    VERS_BYTES       = 3
+    VERSIONS         = (VERS_CHAR, VERS_BYTES)
+
     POS_VERS         = 5
     POS_COMP         = 7
     POS_RAND         = 12
     POS_MIX          = 15
     POS_SEC          = 18
     POS_END          = 22
+    LEN_EXT          = 999
+    HEAD_MAX         = POS_END+4+LEN_EXT
 
     ID               = b'\x05\xd9\x83MH'
     MODE_COMP        = b'Z'
     MODE_RAND        = b'R'
     MODE_MIX         = b'M'
     MODE_SEC         = b'S'
+    MODE_COMP_EXT    = b'z'
+    MODE_EXT         = b'X'
 
     """
          
@@ -237,6 +394,8 @@ class KirmahHeader:
 
     2o :  02     - Version (majeur number)
                    version.rjust(2,'0')
+                   02 : char cipher (utf-8 code points)
+                   03 : byte cipher (raw bytes mod 256)
 
     5o :  Z??    - Compression Mode
                   '?' ord(chr mark pos)%2==0
@@ -259,17 +418,59 @@ class KirmahHeader:
     3o :  S???   - Secure Mode
                   '?' mark[dlen%len(mark)].rjust(3,'0')
 
+    optional extended field, announced by a 'z' in place of the 'Z' of
+    compression mode, so older versions refuse the file :
+
+    4o+ : X???.. - Extended field
+                  '???' payload length .rjust(3,'0')
+                  '..'  payload 'key:value' pairs comma separated
+                        c : compression codec (ex : lzma:6)
+                        k : chunk size of random mode (aligned policy)
+                        p : part count of mix mode (if not 22)
+
     """
 
     @Log(Const.LOG_BUILD)
-    def __init__(self, version, mark, cmode=1, rmode=True, mmode=True):
+    def __init__(self, version, mark, cmode=1, rmode=True, mmode=True, ext=None):
         """"""
         self.version = bytes(str(int(float(version))).rjust(2,'0'),'utf-8')
         self.mark    = mark
         self.cmode   = cmode
         self.rmode   = rmode
         self.mmode   = mmode
+        self.ext     = {} if ext is None else ext
+
 
+    @Log(Const.LOG_DEBUG)
+    def buildExt(self):
+        """Get the extended field of the header, empty without ext values
+        :Returns: `bytes`
+        """
+        if len(self.ext) == 0 : return b''
+        data = Io.bytes(','.join([k+':'+str(self.ext[k]) for k in sorted(self.ext)]))
+        if len(data) > self.LEN_EXT :
+            raise ValueError('header extended field too long')
+        return self.MODE_EXT + Io.bytes(str(len(data)).rjust(3,'0')) + data
+
+
+    @Log(Const.LOG_DEBUG)
+    def readExt(self, data):
+        """Get the dict of an extended field payload
+        :Returns: `dict`
+        """
+        ext = {}
+        for kv in Io.str(data).split(',') :
+            k, sep, v = kv.partition(':')
+            ext[k] = v
+        return ext
+
+
+    @Log(Const.LOG_DEBUG)
+    def getLength(self):
+        """Get the header length
+        :Returns: `int`
+        """
+        return self.POS_END + len(self.buildExt())
 
     @Log(Const.LOG_DEBUG)
     def getPositionnalChar(self, sindex, test=True):
@@ -300,7 +501,8 @@ class KirmahHeader:
         rmpc   = self.getPositionnalChar(cmpc2+5, rmode)
         mmpc   = self.getPositionnalChar(rmpc+5, mmode)
         smpc   = self.mark[dlen%len(self.mark)]
-        head   = [self.ID, self.version, self.MODE_COMP, Io.bytes(str(cmpc1).rjust(2,'0')), Io.bytes(str(cmpc2).rjust(2,'0')), self.MODE_RAND, Io.bytes(str(rmpc).rjust(2,'0')), self.MODE_MIX, Io.bytes(str(mmpc).rjust(2,'0')), self.MODE_SEC, Io.bytes(str(smpc).rjust(3,'0'))]
+        ext    = self.buildExt()
+        head   = [self.ID, self.version, self.MODE_COMP if len(ext)==0 else self.MODE_COMP_EXT, Io.bytes(str(cmpc1).rjust(2,'0')), Io.bytes(str(cmpc2).rjust(2,'0')), self.MODE_RAND, Io.bytes(str(rmpc).rjust(2,'0')), self.MODE_MIX, Io.bytes(str(mmpc).rjust(2,'0')), self.MODE_SEC, Io.bytes(str(smpc).rjust(3,'0')), ext]
         return b''.join(head)
 
 
@@ -309,9 +511,18 @@ class KirmahHeader:
         """"""
 
         isKmh, vers, cmode, rmode, mmode, smode, pc1, badKmh = header[:self.POS_VERS] == self.ID, None, None , None, None, None, None, False
+        ext, hlen = {}, self.POS_END
         if isKmh :
             vers  = int(header[self.POS_VERS:self.POS_VERS+2])
-            if header[self.POS_COMP:self.POS_COMP+1] == self.MODE_COMP :
+            if not vers in self.VERSIONS :
+                badKmh = True
+            if header[self.POS_COMP:self.POS_COMP+1] == self.MODE_COMP_EXT :
+                if header[self.POS_END:self.POS_END+1] == self.MODE_EXT :
+                    hlen = self.POS_END+4+int(header[self.POS_END+1:self.POS_END+4])
+                    ext  = self.readExt(header[self.POS_END+4:hlen])
+                else :
+                    badKmh = True
+            if header[self.POS_COMP:self.POS_COMP+1] in (self.MODE_COMP, self.MODE_COMP_EXT) :
                 if self.checkPositionnalChar(int(header[self.POS_COMP+1:self.POS_COMP+3])) :
                     cmode = self.COMP_ALL if self.checkPositionnalChar(int(header[self.POS_COMP+3:self.POS_COMP+5])) else self.COMP_END
                 else :
@@ -333,7 +544,7 @@ class KirmahHeader:
                 smode = chr(int(header[self.POS_SEC+1:self.POS_SEC+4]))
             else : badKmh = True
 
-        return { 'version':vers, 'cmode':cmode, 'rmode':rmode, 'mmode':mmode,'smode':smode} if isKmh and not badKmh else {}
+        return { 'version':vers, 'cmode':cmode, 'rmode':rmode, 'mmode':mmode,'smode':smode, 'bytes':vers==self.VERS_BYTES, 'ext':ext, 'hlen':hlen} if isKmh and not badKmh else {}
 
 
 
@@ -343,6 +554,7 @@ class KirmahHeader:
 class Kirmah:
 
     VERSION    = '2.1'
+    VERSION_BYTES = '3.0'
     EXT        = '.kmh'
     EXT_TARK   = '.tark'
     DIR_OUTBOX = ''
@@ -351,58 +563,151 @@ class Kirmah:
     DIR_TEMP   = ''
     KMP_FILE   = '.kmp'
 
+    ENGINE_CHAR  = 'char'
+    ENGINE_NUMPY = 'numpy'
+    ENGINE_TABLE = 'table'
+    ENGINES      = (ENGINE_CHAR, ENGINE_NUMPY, ENGINE_TABLE)
+    BLOCK_SIZE   = 1048576
+    PIPE_SIZE    = 4
+    MAX_BUCKETS  = 256
+    CHUNK_LEGACY  = 'legacy'
+    CHUNK_ALIGNED = 'aligned'
+    CHUNK_POLICIES = (CHUNK_LEGACY, CHUNK_ALIGNED)
+    CHUNK_COUNT  = 4000
+    PAGE_SIZE    = 4096
+    MIX_PARTS     = 22
+    MIX_PARTS_MIN = 8
+    MIX_PARTS_MAX = 62
+    MIX_PART_SIZE = 16777216
+    SPLIT_PARTS_MIN   = 12
+    SPLIT_PARTS_MAX   = 62
+    SPLIT_PARTS_LIMIT = 999999
+    PROBE_BLOCKS = 8
+    PROBE_SIZE   = 65536
+    PROBE_NONE   = 0.95
+    PROBE_ALL    = 0.5
+
 
     @Log(Const.LOG_BUILD)
-    def __init__(self, key, mark=None, headcompress=2, headrandom=True, headmix=True):
+    def __init__(self, key, mark=None, headcompress=2, headrandom=True, headmix=True, engine=None, bytemode=False, codec=None, membudget=None, chpolicy=None):
         """"""
-        self.key   = Io.bytes(key)
-        self.mark  = KeyGen(len(key)).getMark(key) if mark is None else mark
-        self.mark2 = hash_sha256(self.mark) + self.mark[::-1]
-        self.ck    = ConfigKey(self.mark2)
-        self.kh    = KirmahHeader(Kirmah.VERSION, Io.bytes(self.mark), headcompress, headrandom, headmix)
+        self.key      = Io.bytes(key)
+        self.mark     = KeyGen(len(key)).getMark(key) if mark is None else mark
+        self.mark2    = hash_sha256(self.mark) + self.mark[::-1]
+        self.ck       = ConfigKey(self.mark2)
+        self.kh       = KirmahHeader(Kirmah.VERSION if not bytemode else Kirmah.VERSION_BYTES, Io.bytes(self.mark), headcompress, headrandom, headmix)
+        self.engine   = Kirmah.getEngine(engine)
+        self.bytemode = bytemode
+        self.npkey    = None
+        self.tables   = {}
+        self.stream   = True
+        self.iostat   = {}
+        self.membudget = membudget
+        self.chpolicy  = chpolicy if chpolicy in self.CHUNK_POLICIES else self.CHUNK_LEGACY
+        self.setCodec(codec)
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def probeCompress(path, bytemode=False):
+        """Estimate compressibility of file `path` on PROBE_BLOCKS blocks
+        sampled over the file (shannon entropy and zlib level 1 trial
+        ratio) and choose the compression mode :
+          - incompressible data (ratio >= PROBE_NONE) is not compressed in
+            byte mode, and in char mode only compressed at end with a fast
+            level, to recover the cipher utf-8 expansion
+          - compressible data (ratio <= PROBE_ALL) or text has a full
+            compression, other files are compressed at end
+        :Returns: `dict`
+        """
+        fsize = Sys.getsize(path)
+        n     = max(1, min(Kirmah.PROBE_BLOCKS, ceil(fsize/Kirmah.PROBE_SIZE)))
+        with Io.rfile(path) as fi :
+            data = []
+            for i in range(n) :
+                fi.seek(0 if n == 1 else i*(fsize-Kirmah.PROBE_SIZE)//(n-1))
+                data.append(fi.read(Kirmah.PROBE_SIZE))
+        data    = b''.join(data)
+        dlen    = max(1, len(data))
+        entropy = -sum([c/dlen*log(c/dlen, 2) for c in Counter(data).values()])
+        z       = Codec.compressor(Codec.ZLIB, 1)
+        ratio   = len(z.compress(data) + z.flush())/dlen if len(data) > 0 else 1.0
+        codec   = None
+        if ratio >= Kirmah.PROBE_NONE :
+            if bytemode :
+                cmode = KirmahHeader.COMP_NONE
+            else :
+                cmode, codec = KirmahHeader.COMP_END, Codec.ZLIB+':1'
+        elif ratio <= Kirmah.PROBE_ALL or not Io.is_binary(path) :
+            cmode = KirmahHeader.COMP_ALL
+        else :
+            cmode = KirmahHeader.COMP_END
+        return { 'cmode':cmode, 'codec':codec, 'entropy':entropy, 'ratio':ratio }
+
+
+    @Log(Const.LOG_DEBUG)
+    def setCodec(self, codec=None):
+        """Set compression `codec` ('name' or 'name:level'), codecs other
+        than zlib are recorded in the header extended field (zlib keep the
+        plain header readable by older versions)"""
+        self.codec, self.lvl = Codec.parse(codec)
+        if self.codec != Codec.DEFAULT :
+            self.kh.ext['c'] = self.codec+':'+str(self.lvl)
+        elif 'c' in self.kh.ext :
+            del self.kh.ext['c']
+
+
+    @Log(Const.LOG_DEBUG)
+    def useHeader(self, decHeader):
+        """Apply modes of decoded header `decHeader` which are not mark
+        dependant (cipher, codec, extended field)"""
+        self.bytemode = decHeader['bytes']
+        self.kh.ext   = dict(decHeader['ext'])
+        self.codec, lvl = Codec.parse(self.kh.ext.get('c'))
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def getEngine(engine=None):
+        """Get the cipher engine to use, falling back on the default one
+        (char loop, or translation tables for the byte cipher) when `engine`
+        is unknown or NumPy is not available
+        :Returns: `str`
+        """
+        if engine == Kirmah.ENGINE_NUMPY and np is None :
+            engine = None
+        return engine if engine in Kirmah.ENGINES else None
 
 
     @Log()
-    def compress_start(self, fromPath, toPath, compress=True, lvl=9, emit=True):
+    def compress_start(self, fromPath, toPath, compress=True, lvl=None, nproc=1, emit=True):
         """"""
         if not Sys.is_cli_cancel():
-            with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    data = fi.read() if not compress else Io.gzcompress(fi.read(), lvl)
-                    fo.write(b2a_base64(data))
+            blocks = self.compressBlocks(self.readBlocks(fromPath), compress, lvl, nproc)
+            self.writeBlocks(self.encodeBlocks(blocks) if not self.bytemode else blocks, toPath)
 
 
     @Log()
     def uncompress_start(self, fromPath, toPath, decompress=True, emit=True):
         """"""
         if not Sys.is_cli_cancel():
-            with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    data = a2b_base64(fi.read())
-                    fo.write(data if not decompress else Io.gzdecompress(data))
+            blocks = self.readBlocks(fromPath)
+            if not self.bytemode : blocks = self.decodeBlocks(blocks)
+            self.writeBlocks(self.uncompressBlocks(blocks, decompress), toPath)
 
 
     @Log()
-    def compress_end(self, fromPath, toPath, compress=True, lvl=9, emit=True):
+    def compress_end(self, fromPath, toPath, compress=True, lvl=None, nproc=1, emit=True):
         """"""
         if not Sys.is_cli_cancel():
-            with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    data   = fi.read()
-                    if compress : data = Io.gzcompress(data, lvl)
-                    header = self.kh.buildHeader(len(data))
-                    fo.write(header)
-                    fo.write(data)
+            self.writeKmh(self.readBlocks(fromPath), toPath, compress, lvl, nproc)
 
 
     @Log()
     def uncompress_end(self, fromPath, toPath, decompress=True, emit=True):
         """"""
         if not Sys.is_cli_cancel():
-            with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    fi.seek(self.kh.POS_END)
-                    fo.write(fi.read() if not decompress else Io.gzdecompress(fi.read()))
+            self.writeBlocks(self.uncompressBlocks(self.readBlocks(fromPath, self.kh.getLength()), decompress), toPath)
 
     @Log(Const.LOG_ALL)
     def encryptStr(self, data, emit=True):
@@ -421,7 +726,11 @@ class Kirmah:
     @Log()
     def encryptToFile(self, fromPath, toPath, i=0, event=None, emit=True):
         """"""
-        if not Sys.is_cli_cancel():
+        if self.bytemode :
+            self.cipherBytesToFile(fromPath, toPath, i, event, False, emit)
+        elif self.engine == self.ENGINE_NUMPY :
+            self.cipherToFileVect(fromPath, toPath, i, event, False, emit)
+        elif not Sys.is_cli_cancel():
             with Io.ufile(fromPath) as fi :
                 with Io.wfile(toPath, False) as fo :
                     s, lk = [], len(self.key)
@@ -438,7 +747,11 @@ class Kirmah:
     @Log()
     def decryptToFile(self, fromPath, toPath, i=0, event=None, emit=True):
         """"""
-        if not Sys.is_cli_cancel():
+        if self.bytemode :
+            self.cipherBytesToFile(fromPath, toPath, i, event, True, emit)
+        elif self.engine == self.ENGINE_NUMPY :
+            self.cipherToFileVect(fromPath, toPath, i, event, True, emit)
+        elif not Sys.is_cli_cancel():
             with Io.ufile(fromPath) as fi :
                 with Io.rfile(fromPath) as fi2 :
                     s = fi2.read()
@@ -461,71 +774,387 @@ class Kirmah:
                         i += 1
 
 
+    @Log(Const.LOG_DEBUG)
+    def getKeySchedule(self, n, i=0):
+        """Get NumPy arrays of key values and i//4 offsets for `n`
+        positions starting at key indice `i`
+        :Returns: `tuple`
+        """
+        if self.npkey is None :
+            self.npkey = np.frombuffer(self.key, dtype=np.uint8).astype(np.int64)
+        ik = (np.arange(n, dtype=np.int64) + i) % len(self.key)
+        return self.npkey[ik], ik // 4
+
+
+    @Log(Const.LOG_DEBUG)
+    def cipherCharsVect(self, s, i=0, decrypt=False):
+        """Apply the char cipher on str `s` with NumPy, starting at key
+        indice `i`. produce the same code points as encryptToFile and
+        decryptToFile char loops
+        :Returns: `str`
+        """
+        c    = np.frombuffer(s.encode('utf-32-le', 'surrogatepass'), dtype='<u4').astype(np.int64)
+        k, q = self.getKeySchedule(len(c), i)
+        if not decrypt :
+            c = c + q + np.where(c + k + q < 11000, k, -k)
+        else :
+            c = c - q + np.where(c + k + q < 110000, -k, k)
+        return c.astype('<u4').tobytes().decode('utf-32-le', 'surrogatepass')
+
+
+    @Log()
+    def cipherToFileVect(self, fromPath, toPath, i=0, event=None, decrypt=False, emit=True):
+        """Vectorized alternative of encryptToFile / decryptToFile, working
+        on blocks of BLOCK_SIZE bytes instead of single chars"""
+        if not Sys.is_cli_cancel():
+            with Io.rfile(fromPath) as fi :
+                with Io.wfile(toPath, False) as fo :
+                    lk, dec = len(self.key), getincrementaldecoder('utf-8')()
+                    for data, part in Io.read_in_chunks(fi, self.BLOCK_SIZE):
+                        if Sys.is_cli_cancel(event) :
+                            Sys.pwarn((('terminating child process ',(str(Sys.getpid()),Sys.CLZ_WARN_PARAM), ' !'),), False)
+                            break
+                        s = dec.decode(data)
+                        try :
+                            fo.write(self.cipherCharsVect(s, i, decrypt))
+                        except Exception as e :
+                            Sys.pwarn((('cipherToFileVect : ',(str(e),Sys.CLZ_ERROR_PARAM), ' !'),), True)
+                            raise e
+                        i = (i + len(s)) % lk
+                    dec.decode(b'', True)
+
+
+    @Log(Const.LOG_DEBUG)
+    def cipherBytes(self, data, i=0, decrypt=False):
+        """Apply the byte cipher (header version 3) on bytes `data`,
+        starting at key indice `i`. each byte is shifted by key[i] + i//4
+        modulo 256, so output has the same size as input
+        :Returns: `bytes`
+        """
+        if self.engine == self.ENGINE_NUMPY :
+            c, (k, q) = np.frombuffer(data, dtype=np.uint8).astype(np.int64), self.getKeySchedule(len(data), i)
+            c = (c + q + k) if not decrypt else (c - q - k)
+            return (c % 256).astype(np.uint8).tobytes()
+        elif self.engine != self.ENGINE_CHAR :
+            return self.cipherBytesTable(data, i, decrypt)
+        lk, key, s = len(self.key), self.key, -1 if decrypt else 1
+        adata = bytearray(len(data))
+        for j, c in enumerate(data):
+            if i >= lk : i = 0
+            adata[j] = (c + s*(i//4 + key[i])) % 256
+            i += 1
+        return bytes(adata)
+
+
+    @Log(Const.LOG_DEBUG)
+    def getTables(self, decrypt=False):
+        """Get (and cache) the 256 bytes translation table of each key
+        indice for the byte cipher
+        :Returns: `list`
+        """
+        if not decrypt in self.tables :
+            b, s = bytes(range(256)), -1 if decrypt else 1
+            self.tables[decrypt] = [ b[(s*(i//4 + k)) % 256:] + b[:(s*(i//4 + k)) % 256] for i, k in enumerate(self.key) ]
+        return self.tables[decrypt]
+
+
+    @Log(Const.LOG_DEBUG)
+    def cipherBytesTable(self, data, i=0, decrypt=False):
+        """Apply the byte cipher on bytes `data` starting at key indice `i`
+        with one bytes.translate call per key indice on strided slices
+        :Returns: `bytes`
+        """
+        tables, lk, n = self.getTables(decrypt), len(self.key), len(data)
+        adata = bytearray(n)
+        for k, t in enumerate(tables):
+            j = (k - i) % lk
+            if j < n : adata[j::lk] = data[j::lk].translate(t)
+        return bytes(adata)
+
+
+    @Log()
+    def cipherBytesToFile(self, fromPath, toPath, i=0, event=None, decrypt=False, emit=True):
+        """Byte cipher alternative of encryptToFile / decryptToFile"""
+        if not Sys.is_cli_cancel():
+            with Io.rfile(fromPath) as fi :
+                with Io.wfile(toPath) as fo :
+                    lk = len(self.key)
+                    for data, part in Io.read_in_chunks(fi, self.BLOCK_SIZE):
+                        if Sys.is_cli_cancel(event) :
+                            Sys.pwarn((('terminating child process ',(str(Sys.getpid()),Sys.CLZ_WARN_PARAM), ' !'),), False)
+                            break
+                        fo.write(self.cipherBytes(data, i, decrypt))
+                        i = (i + len(data)) % lk
+
+
     @Log()
     def randomFileContent(self, fromPath, toPath, emit=True):
         """"""
         d = Sys.datetime.now()
         c = not Sys.is_cli_cancel()
         if c:
-            with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    fsize, chsize, size = Kirmah.getSizes(fromPath)
-                    lst, rest, data     = Kirmah.getRandomListFromKey(self.ck.key, size), chsize - fsize%chsize, ['b']*size
-                    if rest == chsize : rest = 0
-                    for piece, i in Io.read_in_chunks(fi, chsize):
-                        fo.seek(lst[i]*chsize-(rest if lst[i] > lst[size-1] else 0))
-                        fo.write(piece[::-1])
+            self.writeBlocks(self.randomBlocks(fromPath), toPath)
         if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
         Sys.pstep('Random mode', d, c)
 
 
+    @Log()
+    def randomBlocks(self, fromPath):
+        """Generator of randomFileContent content. chunk i of `fromPath` goes
+        to position lst[i], so the output is gathered in destination order
+        (inverse permutation)"""
+        if not Sys.is_cli_cancel() and Sys.getsize(fromPath) > 0 :
+            yield from self.gatherBlocks(fromPath, self.getRandomSlices(*self.getRandomSizes(fromPath)))
+
+
+    @Log(Const.LOG_DEBUG)
+    def getRandomSlices(self, fsize, chsize, size):
+        """Get the (start, end) chunks of random mode in destination order
+        :Returns: `list`
+        """
+        lst, inv = self.getPermutation(size), [0]*size
+        for i, pos in enumerate(lst) : inv[pos] = i
+        return [(i*chsize, min((i+1)*chsize, fsize)) for i in inv]
+
+
     @Log()
     def unRandomFileContent(self, fromPath, toPath, emit=True):
         """"""
         d = Sys.datetime.now()
         c = not Sys.is_cli_cancel()
         if c:
-            with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    fsize, chsize, size    = Kirmah.getSizes(fromPath)
-                    lst, rest, piece, data = Kirmah.getRandomListFromKey(self.ck.key, size), chsize - fsize%chsize, b'', []
-                    if rest == chsize : rest = 0
-                    for i, pos in enumerate(lst):
-                        dp = pos*chsize-(rest if pos >= lst[size-1] and pos!=0 else 0)
-                        if dp >= 0 : fi.seek(dp)
-                        piece = fi.read(chsize)
-                        if i == size-1 and rest > 0 :
-                            piece = piece[:-rest] if lst[i]==0 else piece[rest:]
-                        fo.write(piece[::-1])
+            self.writeBlocks(self.unRandomBlocks(fromPath), toPath)
         if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
         Sys.pstep('Random mode - inv', d, c)
 
 
     @Log()
-    def mixdata(self, fromPath, toPath, encryptNoise=False, label='kirmah', cpart=22, emit=True):
+    def unRandomBlocks(self, fromPath, offset=0):
+        """Generator of unRandomFileContent content, reading `fromPath`
+        from `offset`"""
+        if not Sys.is_cli_cancel() and Sys.getsize(fromPath) > offset :
+            sizes = Kirmah.getSizes(fromPath, offset, int(self.kh.ext['k']) if 'k' in self.kh.ext else None)
+            yield from self.gatherBlocks(fromPath, self.getUnRandomSlices(*sizes), offset)
+
+
+    @Log(Const.LOG_DEBUG)
+    def getUnRandomSlices(self, fsize, chsize, size):
+        """Get the (start, end) chunks of random mode - inv in destination
+        order
+        :Returns: `list`
+        """
+        lst, rest, slices = self.getPermutation(size), chsize - fsize%chsize, []
+        if rest == chsize : rest = 0
+        for i, pos in enumerate(lst):
+            dp = pos*chsize-(rest if pos >= lst[size-1] and pos!=0 else 0)
+            if i == size-1 and rest > 0 :
+                slices.append((dp, dp+chsize-rest) if lst[i]==0 else (dp+rest, min(dp+chsize, fsize)))
+            else :
+                slices.append((dp, min(dp+chsize, fsize)))
+        return slices
+
+
+    @Log()
+    def gatherBlocks(self, fromPath, slices, offset=0):
+        """Generator of the reversed `slices` (start, end) of `fromPath`
+        from `offset`, in order. slices are read from a read-only mapping,
+        or out-of-core when they exceed membudget"""
+        if self.membudget is not None and sum([e-s for s, e in slices]) > self.membudget :
+            yield from self.gatherBlocksExt(fromPath, slices, offset)
+        else :
+            with Io.rfile(fromPath) as fi :
+                with mmap(fi.fileno(), 0, access=ACCESS_READ) as mm :
+                    yield from self.moveBlocks(mm, [(start, end, True) for start, end in slices], offset)
+
+
+    @Log()
+    def moveBlocks(self, mm, slices, offset=0):
+        """Generator of the (start, end, reversed) `slices` of the mapping
+        `mm` from `offset`, joined in BLOCK_SIZE blocks"""
+        data, dlen = [], 0
+        for start, end, rev in slices :
+            data.append(mm[offset+start:offset+end][::-1] if rev else mm[offset+start:offset+end])
+            dlen += end-start
+            if dlen >= self.BLOCK_SIZE :
+                yield b''.join(data)
+                data, dlen = [], 0
+                if Sys.is_cli_cancel(): break
+        if len(data) > 0 : yield b''.join(data)
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def composeSlices(slices, inner):
+        """Compose the (start, end, reversed) `slices` of the concatenation
+        of the `inner` (start, end, reversed) slices, into slices of the
+        source of `inner`
+        :Returns: `list`
+        """
+        pos = [0]
+        for start, end, rev in inner : pos.append(pos[-1]+end-start)
+        cslices = []
+        for start, end, rev in slices :
+            k, parts = bisect_right(pos, start)-1, []
+            while start < end :
+                istart, iend, irev = inner[k]
+                j1, j2 = start-pos[k], min(end, pos[k+1])-pos[k]
+                parts.append((iend-j2, iend-j1, True) if irev else (istart+j1, istart+j2, False))
+                start, k = pos[k]+j2, k+1
+            if rev : parts = [(pstart, pend, not prev) for pstart, pend, prev in reversed(parts)]
+            cslices.extend(parts)
+        return cslices
+
+
+    @Log()
+    def gatherBlocksExt(self, fromPath, slices, offset=0):
+        """Out-of-core gatherBlocks in two sequential passes :
+          - slices are distributed in buckets of consecutive destinations
+            (membudget bytes, at most MAX_BUCKETS buckets), reading
+            `fromPath` once in source order
+          - each bucket, small enough to stay in memory, is then gathered
+            in destination order and removed
+        only BLOCK_SIZE buffers are held by the process"""
+        total  = sum([e-s for s, e in slices])
+        bsize  = max(self.membudget, ceil(total/self.MAX_BUCKETS))
+        bidx, bpos, n, cur = [], [0]*len(slices), 0, 0
+        for start, end in slices :
+            if cur > 0 and cur+end-start > bsize : n, cur = n+1, 0
+            bidx.append(n)
+            cur += end-start
+        paths, fos = [self.DIR_TEMP+Sys.basename(fromPath)+'.bk'+str(b) for b in range(n+1)], []
+        try :
+            for path in paths : fos.append(Io.wfile(path))
+            with Io.rfile(fromPath) as fi :
+                for k in sorted(range(len(slices)), key=lambda k : slices[k][0]) :
+                    fo      = fos[bidx[k]]
+                    bpos[k] = fo.tell()
+                    fi.seek(offset+slices[k][0])
+                    for data in self.readRange(fi, slices[k][1]-slices[k][0]) :
+                        fo.write(data)
+                    if Sys.is_cli_cancel(): return
+            for fo in fos : fo.close()
+            data, dlen, k = [], 0, 0
+            for b, path in enumerate(paths) :
+                with Io.rfile(path) as fb :
+                    while k < len(slices) and bidx[k] == b :
+                        # read the slice backward to reverse it by blocks
+                        start, end = bpos[k], bpos[k]+slices[k][1]-slices[k][0]
+                        while end > start :
+                            pstart = max(start, end-self.BLOCK_SIZE)
+                            fb.seek(pstart)
+                            data.append(fb.read(end-pstart)[::-1])
+                            dlen += end-pstart
+                            end   = pstart
+                            if dlen >= self.BLOCK_SIZE :
+                                yield b''.join(data)
+                                data, dlen = [], 0
+                        k += 1
+                Sys.removeFile(path)
+                if Sys.is_cli_cancel(): return
+            if len(data) > 0 : yield b''.join(data)
+        finally :
+            for fo in fos : fo.close()
+            for path in paths :
+                if Io.file_exists(path) : Sys.removeFile(path)
+
+
+    @Log()
+    def mixdata(self, fromPath, toPath, encryptNoise=False, label='kirmah', cpart=22, nproc=1, emit=True):
         """"""
         d = Sys.datetime.now()
         c = not Sys.is_cli_cancel()
         if c:
+            self.writeParts(fromPath, toPath, self.getMixRanges(Sys.getsize(fromPath), encryptNoise, label, cpart), nproc)
+        if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+        Sys.pstep('Mix mode', d, c)
+
+
+    @Log(Const.LOG_DEBUG)
+    def getMixRanges(self, size, encryptNoise=False, label='kirmah', cpart=22):
+        """Get the parts of mix mode of `size` bytes for writeParts or
+        readParts : noise data and (start, size) ranges
+        :Returns: `list`
+        """
+        hlst         = self.ck.getHashList(label, cpart, False)
+        hlst['data'] = sorted(hlst['data'], key=lambda hlst: hlst[0])
+        noise        = self.getNoisePool(hlst['data'], encryptNoise)
+        psize, parts = ceil(size/cpart), []
+        for row in hlst['data']:
+            parts += [noise.get(row[2]), (psize*row[5], max(0, min(psize, size-psize*row[5]))), noise.get(row[3])]
+        return parts
+
+
+    @Log()
+    def mixBlocks(self, fromPath, encryptNoise=False, label='kirmah', cpart=22):
+        """Generator of mixdata content"""
+        if not Sys.is_cli_cancel():
             hlst         = self.ck.getHashList(label, cpart, False)
             hlst['data'] = sorted(hlst['data'], key=lambda hlst: hlst[0])
+            noise        = self.getNoisePool(hlst['data'], encryptNoise)
             size         = Sys.getsize(fromPath)
             psize        = ceil(size/cpart)
-            cp           = 0
-            rsz          = 0
-            for row in hlst['data']: rsz += row[2]+row[3]
             with Io.rfile(fromPath) as fi:
-                with Io.wfile(toPath) as fo :
-                    bdata, adata = '', ''
-                    for row in hlst['data']:
-                        bdata, adata = self.ck.noiser.getNoise(row[2]), self.ck.noiser.getNoise(row[3])
-                        if encryptNoise :
-                            bdata, adata = self.encryptStr(bdata)[:row[2]], self.encryptStr(adata)[:row[3]]
-                        fi.seek(psize*row[5])
-                        fo.write(bdata[:row[2]] + fi.read(psize) + adata[:row[3]])
-                        cp      += 1
-        if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
-        Sys.pstep('Mix mode', d, c)
+                for row in hlst['data']:
+                    bdata, adata = noise.get(row[2]), noise.get(row[3])
+                    yield bdata
+                    fi.seek(psize*row[5])
+                    yield from self.readRange(fi, psize)
+                    yield adata
+                    if Sys.is_cli_cancel(): break
+
+
+    @Log(Const.LOG_DEBUG)
+    def getMixParts(self, size):
+        """Get the part count of mix mode for `size` bytes : parts of
+        MIX_PART_SIZE up to MIX_PARTS_MAX (getHashList limit), from
+        MIX_PARTS_MIN in byte mode. char mode keeps at least the default
+        MIX_PARTS, so headers of files up to 352M are still read by older
+        versions. the count is recorded in the header extended field if it
+        is not the default one
+        :Returns: `int`
+        """
+        cpart = min(max(ceil(size/self.MIX_PART_SIZE), self.MIX_PARTS_MIN if self.bytemode else self.MIX_PARTS), self.MIX_PARTS_MAX)
+        if cpart == self.MIX_PARTS :
+            self.kh.ext.pop('p', None)
+        else :
+            self.kh.ext['p'] = str(cpart)
+        return cpart
+
+
+    @Log(Const.LOG_DEBUG)
+    def getSplitCount(self, size, psize):
+        """Get the part count of split command for `size` bytes in parts of
+        `psize` bytes, from SPLIT_PARTS_MIN to SPLIT_PARTS_LIMIT
+        :Returns: `int`
+        """
+        return min(max(ceil(size/psize), self.SPLIT_PARTS_MIN), self.SPLIT_PARTS_LIMIT)
+
+
+    @Log(Const.LOG_DEBUG)
+    def getPartCount(self, size, psize):
+        """Get the count of parts written by split for `size` bytes in parts
+        of `psize` bytes, the last parts of the hash list of a small file
+        are empty and not written
+        :Returns: `int`
+        """
+        return ceil(size/psize) if psize > 0 else 0
+
+
+    @Log(Const.LOG_DEBUG)
+    def getHeadMixParts(self):
+        """Get the part count of mix mode of the current header
+        :Returns: `int`
+        """
+        return int(self.kh.ext['p']) if 'p' in self.kh.ext else self.MIX_PARTS
+
+
+    @Log(Const.LOG_DEBUG)
+    def getNoisePool(self, rows, encryptNoise=False):
+        """Get the noise pool of the parts `rows` of a mix mode job. noise
+        is drawn and encrypted at once, then sliced per part
+        :Returns: `NoisePool`
+        """
+        return self.ck.noiser.getPool(sum([row[2]+row[3] for row in rows]), not self.bytemode, self.encryptStr if encryptNoise and not self.bytemode else None)
 
 
     @Log(Const.LOG_DEBUG)
@@ -548,36 +1177,134 @@ class Kirmah:
 
 
     @Log()
-    def unmixdata(self, fromPath, toPath, label='kirmah', cpart=22, emit=True):
+    def unmixdata(self, fromPath, toPath, label='kirmah', cpart=22, nproc=1, offset=0, emit=True):
+        """"""
+        d    = Sys.datetime.now()
+        c    = not Sys.is_cli_cancel()
+        dlen = 0
+        if c:
+            slices = self.getUnmixSlices(Sys.getsize(fromPath)-offset, label, cpart)[0]
+            dlen   = self.writeParts(fromPath, toPath, [(start, end-start) for start, end in slices], nproc, offset)
+        if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+        Sys.pstep('Mix mode - inv', d, c)
+        return dlen
+
+
+    @Log()
+    def unmixBlocks(self, fromPath, offset=0, label='kirmah', cpart=22):
+        """Generator of unmixdata content, reading `fromPath` from `offset`"""
+        if not Sys.is_cli_cancel():
+            with Io.rfile(fromPath) as fi :
+                for start, end in self.getUnmixSlices(Sys.getsize(fromPath)-offset, label, cpart)[0] :
+                    fi.seek(offset+start)
+                    yield from self.readRange(fi, end-start)
+                    if Sys.is_cli_cancel(): break
+
+
+    @Log(Const.LOG_DEBUG)
+    def getUnmixSlices(self, msize, label='kirmah', cpart=22):
+        """Get the (start, end) parts of mix mode - inv in destination order
+        and the unmixed size, from the mixed size `msize`
+        :Returns: `tuple`
+        """
+        rsz, hlst, slices = 0, self.ck.getHashList(label, cpart, True), []
+        for row in hlst['data']:
+            rsz += row[2]+row[3]
+        size         = msize-rsz
+        psize        = ceil(size/cpart)
+        rest         = size % psize
+        if rest == 0 : rest = psize
+        lbi          = self.getNoiseLenBeforeIndex(hlst['data'],psize,rest, size)
+        hlst['data'] = sorted(hlst['data'], key=lambda hlst: hlst[5])
+        mxp = size // psize
+        if size % psize == 0 : mxp -= 1
+        dlen = 0
+        for row in hlst['data']:
+            start = lbi[row[0]]+row[2]
+            # the last part is followed by noise, so keep no more than size
+            l     = min(psize if row[5] <= mxp else (rest if rest!=psize or (psize*cpart==size) else 0), size-dlen)
+            if l > 0 : slices.append((start, start+l))
+            dlen += l
+            if dlen >= size : break
+        return slices, size
+
+
+    @Log(Const.LOG_DEBUG)
+    def canFuse(self, fromPath, offset=0):
+        """Check if random and mix modes of `fromPath` can be done in one
+        pass (fused stages gather from a mapping, so not out-of-core)
+        :Returns: `bool`
+        """
+        size = Sys.getsize(fromPath)-offset
+        return size > 0 and (self.membudget is None or size <= self.membudget)
+
+
+    @Log()
+    def randomMixData(self, fromPath, toPath, encryptNoise=False, label='kirmah', cpart=22, emit=True):
         """"""
         d = Sys.datetime.now()
         c = not Sys.is_cli_cancel()
         if c:
-            rsz, cp, hlst = 0, 0, self.ck.getHashList(label, cpart, True)
-            for row in hlst['data']:
-                rsz += row[2]+row[3]
-            size         = Sys.getsize(fromPath)-rsz
-            psize        = ceil(size/cpart)
-            rest         = size % psize
-            if rest == 0 : rest = psize
-            lbi          = self.getNoiseLenBeforeIndex(hlst['data'],psize,rest, size)
-            hlst['data'] = sorted(hlst['data'], key=lambda hlst: hlst[5])
-            mxp = size // psize
-            if size % psize == 0 : mxp -= 1
+            self.writeBlocks(self.randomMixBlocks(fromPath, self.getRandomSizes(fromPath), encryptNoise, label, cpart), toPath)
+        if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+        Sys.pstep('Random & Mix mode', d, c)
+
+
+    @Log()
+    def randomMixBlocks(self, fromPath, sizes, encryptNoise=False, label='kirmah', cpart=22):
+        """Generator of randomBlocks then mixBlocks content in one pass :
+        each part of mix mode is composed with the chunks of random mode,
+        so data of `fromPath` is moved once without the random temp file.
+        `sizes` (getRandomSizes) are given by the caller as they may change
+        the header before the generator starts"""
+        if not Sys.is_cli_cancel():
+            rslices = [(start, end, True) for start, end in self.getRandomSlices(*sizes)]
             with Io.rfile(fromPath) as fi :
-                with Io.wfile(toPath) as fo :
-                    header = fi.read(self.kh.POS_END)
-                    fi.seek(0,Io.SEEK_CUR)
-                    for row in hlst['data']:
-                        fi.seek(lbi[row[0]]+row[2])
-                        dp = fi.read(psize if row[5] <= mxp else (rest if rest!=psize or (psize*cpart==size) else 0))
-                        cp += 1
-                        if fo.tell() + len(dp) > size :
-                            fo.write(dp[:rest])
-                            break
-                        fo.write(dp)
+                with mmap(fi.fileno(), 0, access=ACCESS_READ) as mm :
+                    yield from self.mixSlices(mm, sizes[0], rslices, encryptNoise, label, cpart)
+
+
+    @Log()
+    def mixSlices(self, buf, fsize, slices, encryptNoise=False, label='kirmah', cpart=22):
+        """Generator of mix mode content of the `fsize` bytes composed by
+        `slices` (start, end, reversed) of `buf`"""
+        if not Sys.is_cli_cancel():
+            hlst         = self.ck.getHashList(label, cpart, False)
+            hlst['data'] = sorted(hlst['data'], key=lambda hlst: hlst[0])
+            noise        = self.getNoisePool(hlst['data'], encryptNoise)
+            psize        = ceil(fsize/cpart)
+            for row in hlst['data']:
+                bdata, adata = noise.get(row[2]), noise.get(row[3])
+                yield bdata
+                start = min(psize*row[5], fsize)
+                yield from self.moveBlocks(buf, Kirmah.composeSlices([(start, min(start+psize, fsize), False)], slices))
+                yield adata
+                if Sys.is_cli_cancel(): break
+
+
+    @Log()
+    def unmixRandomData(self, fromPath, toPath, label='kirmah', cpart=22, emit=True):
+        """"""
+        d = Sys.datetime.now()
+        c = not Sys.is_cli_cancel()
+        if c:
+            self.writeBlocks(self.unmixRandomBlocks(fromPath, 0, label, cpart), toPath)
         if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
-        Sys.pstep('Mix mode - inv', d, c)
+        Sys.pstep('Random & Mix mode - inv', d, c)
+
+
+    @Log()
+    def unmixRandomBlocks(self, fromPath, offset=0, label='kirmah', cpart=22):
+        """Generator of unmixBlocks then unRandomBlocks content in one pass,
+        reading `fromPath` from `offset`. chunks of random mode - inv are
+        composed with the parts of mix mode - inv (noise excluded)"""
+        if not Sys.is_cli_cancel():
+            mslices, size = self.getUnmixSlices(Sys.getsize(fromPath)-offset, label, cpart)
+            sizes         = Kirmah.getChunkSizes(size, int(self.kh.ext['k']) if 'k' in self.kh.ext else None)
+            slices        = [(start, end, True) for start, end in self.getUnRandomSlices(*sizes)]
+            with Io.rfile(fromPath) as fi :
+                with mmap(fi.fileno(), 0, access=ACCESS_READ) as mm :
+                    yield from self.moveBlocks(mm, Kirmah.composeSlices(slices, [(start, end, False) for start, end in mslices]), offset)
 
 
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
@@ -589,7 +1316,7 @@ class Kirmah:
         if not Sys.is_cli_cancel():
             d = Sys.datetime.now()
             Sys.cli_emit_progress(2)
-            self.split(fromPath, hlst)
+            self.split(fromPath, hlst, nproc)
             Sys.cli_emit_progress(70)
             if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
             Sys.pstep('Splitting file', d, True)
@@ -600,8 +1327,7 @@ class Kirmah:
     def kcfEnc(self, hlst, nproc=1):
         if not Sys.is_cli_cancel():
             d = Sys.datetime.now()
-            theStr  = {'name': hlst['head'][0], 'count': hlst['head'][1] }
-            Io.set_data(self.DIR_DEPLOY+hlst['head'][2]+'.tmp', str(theStr))
+            Io.set_data(self.DIR_DEPLOY+hlst['head'][2]+'.tmp', self.getKcfContent(hlst))
             self.encrypt(self.DIR_DEPLOY+hlst['head'][2]+'.tmp', self.DIR_DEPLOY+hlst['head'][2]+'.kcf', nproc, KirmahHeader(self.VERSION, Io.bytes(self.mark), KirmahHeader.COMP_NONE, True, True), False)
             Sys.removeFile(self.DIR_DEPLOY+hlst['head'][2]+'.tmp')
             if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
@@ -611,15 +1337,39 @@ class Kirmah:
 
 
     @Log()
-    def split(self, fromPath, hlst):
-        """"""
+    def kcfEncBytes(self, hlst, index=None):
+        """In memory alternative of kcfEnc, with the tark `index` of parts
+        if given
+        :Returns: `bytes`
+        """
+        if not Sys.is_cli_cancel():
+            d    = Sys.datetime.now()
+            data = self.encryptBytes(Io.bytes(self.getKcfContent(hlst, index)), KirmahHeader(self.VERSION, Io.bytes(self.mark), KirmahHeader.COMP_NONE, True, True))
+            if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+            Sys.pstep('Encrypting Kirmah configuration file', d, True)
+            return data
+
+
+    @Log(Const.LOG_DEBUG)
+    def getKcfContent(self, hlst, index=None):
+        """Get the kcf content of `hlst`, with the tark `index` of parts if
+        given (ignored by older versions)
+        :Returns: `str`
+        """
+        theStr  = {'name': hlst['head'][0], 'count': hlst['head'][1], 'psize': hlst['head'][4], 'size': hlst['head'][5] }
+        if index is not None : theStr['index'] = index
+        return str(theStr)
+
+
+    @Log()
+    def split(self, fromPath, hlst, nproc=1):
+        """Split `fromPath` in parts of the (sorted) hash list. parts are
+        independent slices of a read-only mapping, with `nproc` > 1 they
+        are compressed and written by a thread pool"""
         if not Sys.is_cli_cancel():
             self.DIR_OUTBOX = ''
-            f               = open(fromPath, 'rb+')
-            m, p, rsz       = mmap(f.fileno(), 0), 0, 0
             fsize           = Sys.getsize(fromPath)
             Sys.cli_emit_progress(3)
-            for row in hlst['data']: rsz += row[2]+row[3]
             # ensure correct order
             hlst['data']    = sorted(hlst['data'], key=lambda lst: lst[0])
 
@@ -627,40 +1377,117 @@ class Kirmah:
             psize  = ceil(fsize/hlst['head'][1])
             Sys.cli_emit_progress(4)
             perc = 5
-            frav = 1.40
-            while m.tell() < m.size():
-                perc += frav
-                Sys.cli_emit_progress(perc)
-                self.splitPart(m, psize, hlst['data'][p])
-                perc += frav
-                Sys.cli_emit_progress(perc)
-                p += 1
-            m.close()
+            frav = 2.80
+            with Io.rfile(fromPath) as f :
+                with mmap(f.fileno(), 0, access=ACCESS_READ) as m :
+                    parts = [(m, p*psize, psize, hlst['data'][p]) for p in range(self.getPartCount(fsize, psize))]
+                    if nproc > 1 :
+                        with ThreadPoolExecutor(nproc) as pool :
+                            for n in pool.map(lambda part : self.splitPart(*part), parts) :
+                                perc += frav
+                                Sys.cli_emit_progress(perc)
+                    else :
+                        for part in parts :
+                            self.splitPart(*part)
+                            perc += frav
+                            Sys.cli_emit_progress(perc)
 
             # ensure random order
             hlst['data'] = sorted(hlst['data'], key=lambda lst: lst[4])
-            hlst['head'].append(psize)
+            hlst['head'] += [psize, fsize]
             return hlst
 
 
     @Log()
-    def splitPart(self, mmap, size, phlst):
+    def splitPart(self, mmap, start, size, phlst):
         """"""
         if not Sys.is_cli_cancel():
             with Io.wfile(self.DIR_OUTBOX+phlst[1]+self.EXT) as fo :
-                bdata, adata, part = self.ck.noiser.getNoise(phlst[2], False)[len(self.splheader):], self.ck.noiser.getNoise(phlst[3], False), int(phlst[0])
-                zd  = Io.gzcompress(bdata+mmap.read(size)+adata)
-                hz  = Io.bytes(self.offuscate(zd[:self.kh.POS_END], part))
-                lhz = Io.bytes(str(part + len(hz)).rjust(3,'0'))
-                fo.write(self.splheader+lhz+hz+zd[self.kh.POS_END:])
+                fo.write(self.getSplitPart(mmap, start, size, phlst))
+
+
+    @Log(Const.LOG_DEBUG)
+    def getSplitPart(self, mmap, start, size, phlst):
+        """Get the content of part `phlst`, `size` bytes of `mmap` from
+        `start` with noise, compressed and offuscated
+        :Returns: `bytes`
+        """
+        # offuscation index is wrapped beyond SPLIT_PARTS_MAX parts
+        bdata, adata, part = self.ck.noiser.getNoise(phlst[2], False)[len(self.splheader):], self.ck.noiser.getNoise(phlst[3], False), int(phlst[0]) % self.SPLIT_PARTS_MAX
+        zd  = Io.gzcompress(bdata+mmap[start:start+size]+adata)
+        hz  = Io.bytes(self.offuscate(zd[:self.kh.POS_END], part))
+        lhz = Io.bytes(str(part + len(hz)).rjust(3,'0'))
+        return self.splheader+lhz+hz+zd[self.kh.POS_END:]
+
+
+    @Log()
+    def splitTar(self, fromPath, hlst, toPath, nproc=1, mtime=0):
+        """Split `fromPath` straight into the tar archive `toPath` (tark v2)
+        : parts are built in memory and appended in random order as members
+        of `mtime`, then the kcf (encrypted in memory) holding the index of
+        parts offsets is the last member. no file is written but the archive
+        :Returns: `str` toPath
+        """
+        if not Sys.is_cli_cancel():
+            Sys.cli_emit_progress(2)
+            self.DIR_OUTBOX = ''
+            fsize           = Sys.getsize(fromPath)
+            # ensure correct order
+            hlst['data']    = sorted(hlst['data'], key=lambda lst: lst[0])
+            self.splheader  = self.kh.buildHeader(fsize)
+            psize           = ceil(fsize/hlst['head'][1])
+            hlst['head']   += [psize, fsize]
+            perc, frav      = 75, 0.30
+            # ensure random order
+            rows            = [row for row in sorted(hlst['data'], key=lambda lst: lst[4]) if row[0] < self.getPartCount(fsize, psize)]
+            index           = {}
+            with tarfile.open(toPath, mode='w') as tar :
+                with Io.rfile(fromPath) as f :
+                    with mmap(f.fileno(), 0, access=ACCESS_READ) as m :
+                        parts = [(m, row[0]*psize, psize, row) for row in rows]
+                        for row, data in zip(rows, self.getSplitParts(parts, nproc)) :
+                            index[row[0]] = (self.addTarMember(tar, row[1]+self.EXT, data, mtime), len(data))
+                            perc += frav
+                            Sys.cli_emit_progress(perc)
+                self.addTarMember(tar, hlst['head'][2]+'.kcf', self.kcfEncBytes(hlst, index), mtime)
+            hlst['data'] = sorted(hlst['data'], key=lambda lst: lst[4])
+            return toPath
+
+
+    @Log()
+    def getSplitParts(self, parts, nproc=1):
+        """Generator of getSplitPart content of `parts` in order. with
+        `nproc` > 1 at most 2*`nproc` parts are built ahead by a thread pool"""
+        if nproc > 1 :
+            with ThreadPoolExecutor(nproc) as pool :
+                pending = deque()
+                for part in parts :
+                    pending.append(pool.submit(self.getSplitPart, *part))
+                    if len(pending) > 2*nproc : yield pending.popleft().result()
+                while len(pending) > 0 : yield pending.popleft().result()
+        else :
+            for part in parts : yield self.getSplitPart(*part)
+
+
+    @Log(Const.LOG_DEBUG)
+    def addTarMember(self, tar, name, data, mtime=0):
+        """Append `data` to `tar` as the regular file member `name`
+        :Returns: `int` offset of data in the archive
+        """
+        info       = tar.tarinfo(name)
+        info.size  = len(data)
+        info.mtime = mtime
+        tar.addfile(info, BytesIO(data))
+        return tar.offset - ceil(info.size/tarfile.BLOCKSIZE)*tarfile.BLOCKSIZE
 
 
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
     # # MERGE # #
 
     @Log()
-    def mergeFile(self, fromPath, toPath=None, uid=''):
-        """"""
+    def mergeFile(self, fromPath, toPath=None, uid='', nproc=1, tar=None):
+        """Merge parts of the kcf `fromPath`, read from the tar archive
+        `tar` if given"""
         if not Sys.is_cli_cancel():
             Sys.cli_emit_progress(2)
             self.decrypt(fromPath, '.cfg')
@@ -677,15 +1504,50 @@ class Kirmah:
             toPath, ext = Sys.getFileExt(toPath)
             dirs    = (Sys.dirname(Sys.realpath(toPath)) if toPath is not None else Sys.dirname(Sys.realpath(fromPath)))+Sys.sep
             Sys.cli_emit_progress(10)
-            toPath  = self.merge(theList, toPath, ext, uid, dirs)
+            # part and file sizes are missing in kcf of older versions
+            sizes   = (clist['psize'], clist['size']) if 'psize' in clist else None
+            if tar is not None :
+                self.tarIndex = clist.get('index')
+            toPath  = self.merge(theList, toPath, ext, uid, dirs, nproc=nproc, sizes=sizes, tar=tar)
             Sys.removeFile(fromPath)
             Sys.cli_emit_progress(90)
             return toPath
 
 
     @Log()
-    def merge(self, hlst, fileName, ext='', uid='', dirs=None, fake=False):
-        """"""
+    def mergeTar(self, fromPath, toPath=None, uid='', nproc=1):
+        """Merge the tar archive `fromPath` without extracting it : the kcf
+        member is decrypted first, then parts are decompressed straight from
+        their members
+        :Returns: `str` merged file path
+        """
+        if not Sys.is_cli_cancel():
+            with tarfile.open(fromPath, mode='r') as tar :
+                # the kcf is the first member of older tark, the last of tark v2
+                kcf = tar.next()
+                if kcf is None or kcf.name[-4:]!='.kcf' :
+                    kcf = None
+                    for tarinfo in tar.getmembers() :
+                        if tarinfo.isreg() and tarinfo.name[-4:]=='.kcf':
+                            kcf = tarinfo
+                            break
+                if kcf is None : raise Exception('missing kcf member')
+                kcfPath       = self.DIR_TEMP+Sys.basename(kcf.name)
+                self.tarLock  = Lock()
+                try :
+                    with Io.wfile(kcfPath) as fo :
+                        fo.write(tar.extractfile(kcf).read())
+                    return self.mergeFile(kcfPath, toPath, uid, nproc, tar)
+                finally :
+                    if Io.file_exists(kcfPath) : Sys.removeFile(kcfPath)
+
+
+    @Log()
+    def merge(self, hlst, fileName, ext='', uid='', dirs=None, fake=False, nproc=1, sizes=None, tar=None):
+        """Merge parts of `hlst`, read from the tar archive `tar` if given. with `nproc` > 1 and the (psize, size)
+        `sizes` of the kcf, the output is preallocated and parts are
+        decompressed by a thread pool then written at their offsets,
+        parts are written in order otherwise"""
         if not Sys.is_cli_cancel():
             p = 0
             # ensure correct order
@@ -707,29 +1569,59 @@ class Kirmah:
             depDir   = dirs
             perc     = 10
             frav     = 2.7
+            # only parts holding data are written by split
+            count    = hlst['head'][1] if sizes is None else self.getPartCount(sizes[1], sizes[0])
             with Io.wfile(filePath) as fo :
-                while p < hlst['head'][1] :
-                    perc += 0.5
-                    Sys.cli_emit_progress(perc)
+                if nproc > 1 and sizes is not None and pwrite is not None :
+                    psize, size = sizes
+                    fo.truncate(size)
                     try:
-                        self.mergePart(fo, hlst['data'][p], depDir)
+                        with ThreadPoolExecutor(nproc) as pool :
+                            for n in pool.map(lambda p : self.mergePart(fo, hlst['data'][p], depDir, p*psize, tar), range(count)) :
+                                perc += frav+0.5
+                                Sys.cli_emit_progress(perc)
                     except Exception as e:
                         Sys.pwarn((('merge : ',(str(e),Sys.CLZ_WARN_PARAM), ' !'),), True)
                         raise e
-                    perc += frav
-                    Sys.cli_emit_progress(perc)
-                    p += 1
+                else :
+                    while p < count :
+                        perc += 0.5
+                        Sys.cli_emit_progress(perc)
+                        try:
+                            self.mergePart(fo, hlst['data'][p], depDir, None, tar)
+                        except Exception as e:
+                            Sys.pwarn((('merge : ',(str(e),Sys.CLZ_WARN_PARAM), ' !'),), True)
+                            raise e
+                        perc += frav
+                        Sys.cli_emit_progress(perc)
+                        p += 1
             return filePath
 
 
     @Log()
-    def mergePart(self, fo, phlst, depDir):
-        """"""
+    def mergePart(self, fo, phlst, depDir, pos=None, tar=None):
+        """Write part `phlst` to file object `fo`, or at `pos` of its file
+        descriptor with positional I/O if given. the part is read in
+        `depDir` then removed, or read from its member of `tar` if given"""
         if not Sys.is_cli_cancel():
-            with Io.rfile(depDir+phlst[1]+self.EXT) as fi:
-                part, head = int(phlst[0]), fi.read(self.kh.POS_END)
-                fo.write(Io.gzdecompress(self.deoffuscate(Io.str(fi.read(int(fi.read(3))-part)), part) + fi.read())[phlst[2]-self.kh.POS_END:-phlst[3]])
-            Sys.removeFile(depDir+phlst[1]+self.EXT)
+            if tar is None :
+                fi = Io.rfile(depDir+phlst[1]+self.EXT)
+            elif self.tarIndex is not None and pread is not None :
+                # tark v2, positional read of the indexed part
+                offset, size = self.tarIndex[int(phlst[0])]
+                fi = BytesIO(pread(tar.fileobj.fileno(), size, offset))
+            else :
+                # members share the archive file object
+                with self.tarLock :
+                    fi = BytesIO(tar.extractfile(phlst[1]+self.EXT).read())
+            with fi :
+                part, head = int(phlst[0]) % self.SPLIT_PARTS_MAX, fi.read(self.kh.POS_END)
+                data = Io.gzdecompress(self.deoffuscate(Io.str(fi.read(int(fi.read(3))-part)), part) + fi.read())[phlst[2]-self.kh.POS_END:-phlst[3]]
+            if pos is None :
+                fo.write(data)
+            else :
+                self.writeAt(fo.fileno(), data, pos)
+            if tar is None : Sys.removeFile(depDir+phlst[1]+self.EXT)
 
 
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
@@ -749,15 +1641,17 @@ class Kirmah:
 
 
     @Log()
-    def encrypt_sp_start(self, fromPath, toPath, header=None, emit=True):
+    def encrypt_sp_start(self, fromPath, toPath, header=None, nproc=1, emit=True):
         """"""
         if not Sys.is_cli_cancel():
             if header is not None :
                 self.kh = header
+            for k in ('k', 'p') : self.kh.ext.pop(k, None)
             fsize = Sys.getsize(fromPath)
             if fsize > 0 :
                 strh = self.kh.buildHeader(fsize)
                 decHeader = self.kh.readHeader(strh)
+                self.useHeader(decHeader)
                 self.tmpPath1  = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp'
                 self.tmpPath2  = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp2'
                 compend, compstart = not decHeader['cmode']== KirmahHeader.COMP_NONE, decHeader['cmode']== KirmahHeader.COMP_ALL
@@ -767,7 +1661,7 @@ class Kirmah:
                 if compstart :
                     if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                     Sys.ptask('Compressing data')
-                self.compress_start(fp, tp, compstart, emit=emit)
+                self.compress_start(fp, tp, compstart, nproc=nproc, emit=emit)
                 if compstart :
                     if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                     Sys.pstep('Compression mode', d, True)
@@ -777,9 +1671,15 @@ class Kirmah:
 
 
     @Log()
-    def encrypt_sp_end(self, fp, tp, toPath, rmode, mmode, compend, emit=True):
+    def encrypt_sp_end(self, fp, tp, toPath, rmode, mmode, compend, nproc=1, emit=True):
         """"""
         if not Sys.is_cli_cancel():
+            if rmode and mmode and self.canFuse(fp) :
+                if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                Sys.ptask('Randomizing and mixing data')
+                self.randomMixData(fp, tp, True, cpart=self.getMixParts(Sys.getsize(fp)), emit=emit)
+                fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
+                rmode, mmode = False, False
             if rmode :
                 #~ self.mpRandomFileContent(fp, tp, 4)
                 if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
@@ -791,7 +1691,7 @@ class Kirmah:
             if mmode :
                 if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                 Sys.ptask('Mixing data')
-                self.mixdata(fp, tp, True, emit=emit)
+                self.mixdata(fp, tp, True, cpart=self.getMixParts(Sys.getsize(fp)), nproc=nproc, emit=emit)
 
                 fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
             if emit : Sys.cli_emit_progress(85)
@@ -800,7 +1700,7 @@ class Kirmah:
                 d = Sys.datetime.now()
                 if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                 Sys.ptask('Compressing data')
-            self.compress_end(fp, toPath, compend, emit=emit)
+            self.compress_end(fp, toPath, compend, nproc=nproc, emit=emit)
             if emit : Sys.cli_emit_progress(95)
 
             if compend :
@@ -826,7 +1726,7 @@ class Kirmah:
             self.mproc_fsize = []
             fsize  = Sys.getsize(fp)
             chsize = (fsize//nproc)+1
-            if fsize % chsize == 0 : chsize -= 1
+            if fsize % chsize == 0 and chsize > 1 : chsize -= 1
 
             hlstPaths = []
             with Io.rfile(fp) as fi :
@@ -860,7 +1760,8 @@ class Kirmah:
                 Sys.pstep('Encrypt data', d, c)
             else :
                 hlstPaths = self.prepare_mproc_encode(fp, nproc)
-                mg        = Manager(self.mproc_encode_part, nproc, None, Sys.g.MPEVENT)
+                # tiny inputs have fewer chunks than processes
+                mg        = Manager(self.mproc_encode_part, min(nproc, len(hlstPaths)), None, Sys.g.MPEVENT)
                 mg.run()
                 self.mpMergeFiles(hlstPaths, tp, emit=emit)
                 if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
@@ -873,10 +1774,13 @@ class Kirmah:
         """"""
         if emit : Sys.cli_emit_progress(0)
         if not Sys.is_cli_cancel():
-            fp, tp, rmode, mmode, compend = self.encrypt_sp_start(fromPath, toPath, header, emit=True)
-            self.encrypt_mproc(fp, tp, nproc, emit=True)
-            fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
-            self.encrypt_sp_end(fp, tp, toPath, rmode, mmode, compend, emit=True)
+            if self.stream :
+                self.encrypt_stream(fromPath, toPath, header, nproc, emit=emit)
+            else :
+                fp, tp, rmode, mmode, compend = self.encrypt_sp_start(fromPath, toPath, header, nproc, emit=True)
+                self.encrypt_mproc(fp, tp, nproc, emit=True)
+                fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
+                self.encrypt_sp_end(fp, tp, toPath, rmode, mmode, compend, nproc, emit=True)
         if emit : Sys.cli_emit_progress(100)
 
 
@@ -884,21 +1788,22 @@ class Kirmah:
     # # DECRYPT # #
 
     @Log()
-    def decrypt_sp_start(self, fromPath, toPath, emit=True):
+    def decrypt_sp_start(self, fromPath, toPath, nproc=1, emit=True):
         """"""
         if not Sys.is_cli_cancel():
             if Sys.getsize(fromPath) > 0 :
                 self.tmpPath1 = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp'
                 self.tmpPath2 = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp2'
                 fsize = Sys.getsize(fromPath)
-                fsize -= self.kh.POS_END
                 with Io.rfile(fromPath) as f :
                     d = Sys.datetime.now()
                     if emit : Sys.cli_emit_progress(1)
-                    decHeader = self.kh.readHeader(f.read(self.kh.POS_END))
+                    decHeader = self.kh.readHeader(f.read(self.kh.HEAD_MAX))
                     if emit : Sys.cli_emit_progress(2)
                     #~ print(decHeader)
                     if len(decHeader) > 0 :
+                        self.useHeader(decHeader)
+                        fsize -= decHeader['hlen']
                         if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                         if decHeader['smode'] == self.mark[fsize%len(self.mark)] :
                             Sys.pstep('Reading Header', d, True)
@@ -922,14 +1827,21 @@ class Kirmah:
                     fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
 
 
-                    if decHeader['mmode'] :
+                    rmode, mmode = decHeader['rmode'], decHeader['mmode']
+                    if rmode and mmode and self.canFuse(fp) :
+                        if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                        Sys.ptask('Sorting and reordering data')
+                        self.unmixRandomData(fp, tp, cpart=self.getHeadMixParts(), emit=emit)
+                        fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
+                        rmode, mmode = False, False
+                    if mmode :
                         d = Sys.datetime.now()
                         if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                         Sys.ptask('Sorting data')
-                        self.unmixdata(fp, tp, emit=emit)
+                        self.unmixdata(fp, tp, cpart=self.getHeadMixParts(), nproc=nproc, emit=emit)
                         fp, tp = tp, self.tmpPath2 if tp == self.tmpPath1 else self.tmpPath1
                     if emit : Sys.cli_emit_progress(20)
-                    if decHeader['rmode'] :
+                    if rmode :
                         d = Sys.datetime.now()
                         if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
                         Sys.ptask('Reordering data')
@@ -980,7 +1892,8 @@ class Kirmah:
                 Sys.pstep('Decrypt data', d, True)
             else :
                 hlstPaths = self.prepare_mproc_decode(fromPath, nproc)
-                mg        = Manager(self.mproc_decode_part, nproc, None, Sys.g.MPEVENT, emit=True)
+                # tiny inputs have fewer chunks than processes
+                mg        = Manager(self.mproc_decode_part, min(nproc, len(hlstPaths)), None, Sys.g.MPEVENT, emit=True)
                 mg.run()
                 self.mpMergeFiles(hlstPaths, toPath, emit=emit)
                 if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
@@ -995,15 +1908,15 @@ class Kirmah:
             self.mproc_fsize = []
             fsize  = Sys.getsize(fp)
             chsize = (fsize//nproc)+1
-            if fsize % chsize == 0 : chsize -= 1
+            if fsize % chsize == 0 and chsize > 1 : chsize -= 1
 
             hlstPaths = []
             with Io.rfile(fp) as fi :
                 content = ''
-                for pdata, part in Io.read_in_chunks(fi, chsize, True):
-                    content = Io.str(pdata)
+                for pdata, part in Io.read_in_chunks(fi, chsize, not self.bytemode):
+                    content = Io.str(pdata) if not self.bytemode else pdata
                     self.mproc_fsize.append(len(content))
-                    Io.set_data(self.KMP_FILE+'_'+str(Sys.getpid())+'_'+str(part), content)
+                    Io.set_data(self.KMP_FILE+'_'+str(Sys.getpid())+'_'+str(part), content, self.bytemode)
                     hlstPaths.append(self.KMP_FILE+'dec_'+str(Sys.getpid())+'_'+str(part))
 
             return hlstPaths
@@ -1024,14 +1937,614 @@ class Kirmah:
         """"""
         Sys.cli_emit_progress(0)
         if not Sys.is_cli_cancel():
-            fp, tp, compstart = self.decrypt_sp_start(fromPath, toPath, emit=emit)
-            self.decrypt_mproc(fp, tp, nproc, emit=emit)
-            self.decrypt_sp_end(tp, toPath, compstart, emit=emit)
+            if self.stream :
+                self.decrypt_stream(fromPath, toPath, nproc, emit=emit)
+            else :
+                fp, tp, compstart = self.decrypt_sp_start(fromPath, toPath, nproc, emit=emit)
+                self.decrypt_mproc(fp, tp, nproc, emit=emit)
+                self.decrypt_sp_end(tp, toPath, compstart, emit=emit)
 
         Sys.cli_emit_progress(100)
 
 
 
+    # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+    # # STREAM # #
+
+    @Log()
+    def readBlocks(self, fromPath, offset=0):
+        """Generator of BLOCK_SIZE blocks of `fromPath` from `offset`"""
+        with Io.rfile(fromPath) as fi :
+            fi.seek(offset)
+            for data, part in Io.read_in_chunks(fi, self.BLOCK_SIZE):
+                if Sys.is_cli_cancel(): break
+                yield data
+
+
+    @Log(Const.LOG_DEBUG)
+    def readRange(self, fi, size):
+        """Generator of at most BLOCK_SIZE blocks of the next `size` bytes
+        of file object `fi`"""
+        while size > 0 :
+            data = fi.read(min(size, self.BLOCK_SIZE))
+            if not data : break
+            size -= len(data)
+            yield data
+
+
+    @Log(Const.LOG_DEBUG)
+    def copyRange(self, fi, fo, offset, size):
+        """Copy at most `size` bytes of file object `fi` from `offset` to
+        file object `fo`. data is copied kernel side by copy_file_range, or
+        sendfile, and only goes through buffers if none is available. used
+        by writeParts without concurrency : mix modes of the legacy path and
+        the unmix spill of decrypt_stream (copyPart is used with `nproc` > 1)
+        :Returns: `int` copied size
+        """
+        fo.flush()
+        dlen, ifd, ofd = 0, fi.fileno(), fo.fileno()
+        for copy in (copy_file_range, sendfile) :
+            if copy is not None :
+                try :
+                    while dlen < size :
+                        if copy is copy_file_range :
+                            n = copy(ifd, ofd, size-dlen, offset+dlen)
+                        else :
+                            n = copy(ofd, ifd, offset+dlen, size-dlen)
+                        if n == 0 : break
+                        dlen += n
+                    return dlen
+                except OSError :
+                    # unsupported on this file system, try the next one
+                    pass
+        fi.seek(offset+dlen)
+        for data in self.readRange(fi, size-dlen):
+            fo.write(data)
+            dlen += len(data)
+        return dlen
+
+
+    @Log(Const.LOG_DEBUG)
+    def copyPart(self, ifd, ofd, src, dst, size):
+        """Copy at most `size` bytes of file descriptor `ifd` at `src` to
+        file descriptor `ofd` at `dst` with positional I/O, so parts can be
+        copied concurrently. data is copied kernel side by copy_file_range
+        if available, by pread and pwrite otherwise
+        :Returns: `int` copied size
+        """
+        dlen = 0
+        if copy_file_range is not None :
+            try :
+                while dlen < size :
+                    n = copy_file_range(ifd, ofd, size-dlen, src+dlen, dst+dlen)
+                    if n == 0 : break
+                    dlen += n
+                return dlen
+            except OSError :
+                pass
+        while dlen < size and not Sys.is_cli_cancel() :
+            data = pread(ifd, min(size-dlen, self.BLOCK_SIZE), src+dlen)
+            if not data : break
+            self.writeAt(ofd, data, dst+dlen)
+            dlen += len(data)
+        return dlen
+
+
+    @Log(Const.LOG_DEBUG)
+    def writeAt(self, fd, data, pos):
+        """Write `data` to file descriptor `fd` at `pos` with pwrite"""
+        data = memoryview(data)
+        while len(data) > 0 :
+            n     = pwrite(fd, data, pos)
+            data, pos = data[n:], pos+n
+
+
+    @Log()
+    def writeParts(self, fromPath, toPath, parts, nproc=1, offset=0):
+        """Write `parts` to `toPath`, a part is either data (noise) or a
+        (start, size) range of `fromPath` from `offset`. with `nproc` > 1
+        ranges are copied by a thread pool with positional I/O into the
+        preallocated output, in order by copyRange otherwise
+        :Returns: `int` written size
+        """
+        with Io.rfile(fromPath) as fi :
+            with Io.wfile(toPath) as fo :
+                if nproc > 1 and pwrite is not None :
+                    jobs, dlen, ifd, ofd = [], 0, fi.fileno(), fo.fileno()
+                    for part in parts :
+                        if isinstance(part, tuple) :
+                            jobs.append((offset+part[0], dlen, part[1]))
+                            dlen += part[1]
+                        else :
+                            dlen += len(part)
+                    fo.truncate(dlen)
+                    dlen = 0
+                    for part in parts :
+                        if isinstance(part, tuple) :
+                            dlen += part[1]
+                        else :
+                            self.writeAt(ofd, part, dlen)
+                            dlen += len(part)
+                    with ThreadPoolExecutor(nproc) as pool :
+                        for n in pool.map(lambda job : self.copyPart(ifd, ofd, *job), jobs) : pass
+                else :
+                    dlen = 0
+                    for part in parts :
+                        if isinstance(part, tuple) :
+                            dlen += self.copyRange(fi, fo, offset+part[0], part[1])
+                        else :
+                            fo.write(part)
+                            dlen += len(part)
+                        if Sys.is_cli_cancel(): break
+        return dlen
+
+
+    @Log()
+    def readParts(self, fromPath, parts, nproc=1, offset=0):
+        """Generator of writeParts content of `parts`, ranges are read in
+        BLOCK_SIZE blocks. with `nproc` > 1 blocks are read ahead by a
+        thread pool with positional I/O, yielded in order with at most
+        2*`nproc` blocks in flight"""
+        with Io.rfile(fromPath) as fi :
+            if nproc > 1 and pread is not None :
+                fd = fi.fileno()
+                with ThreadPoolExecutor(nproc) as pool :
+                    pending = deque()
+                    for part in parts :
+                        if isinstance(part, tuple) :
+                            start, end = offset+part[0], offset+part[0]+part[1]
+                            for pos in range(start, end, self.BLOCK_SIZE) :
+                                pending.append(pool.submit(pread, fd, min(self.BLOCK_SIZE, end-pos), pos))
+                        else :
+                            pending.append(part)
+                        while len(pending) > 2*nproc :
+                            data = pending.popleft()
+                            yield data.result() if isinstance(data, Future) else data
+                        if Sys.is_cli_cancel(): break
+                    while len(pending) > 0 :
+                        data = pending.popleft()
+                        yield data.result() if isinstance(data, Future) else data
+            else :
+                for part in parts :
+                    if isinstance(part, tuple) :
+                        fi.seek(offset+part[0])
+                        yield from self.readRange(fi, part[1])
+                    else :
+                        yield part
+                    if Sys.is_cli_cancel(): break
+
+
+    @Log()
+    def writeBlocks(self, blocks, toPath):
+        """Write `blocks` to `toPath`
+        :Returns: `int` written size
+        """
+        dlen = 0
+        with Io.wfile(toPath) as fo :
+            for data in blocks :
+                fo.write(data)
+                dlen += len(data)
+        return dlen
+
+
+    @Log()
+    def spillBlocks(self, blocks, toPath):
+        """Write `blocks` to the temp file `toPath` when the next stage
+        need a random access on its input
+        :Returns: `str` toPath
+        """
+        self.iostat['spill'] = self.iostat.get('spill', 0) + self.writeBlocks(blocks, toPath)
+        return toPath
+
+
+    @Log(Const.LOG_DEBUG)
+    def countBlocks(self, blocks, name):
+        """Generator counting bytes of `blocks` in iostat[`name`]"""
+        self.iostat[name] = 0
+        for data in blocks :
+            self.iostat[name] += len(data)
+            yield data
+
+
+    @Log()
+    def compressBlocks(self, blocks, compress=True, lvl=None, nproc=1):
+        """Generator of `blocks` compressed with the codec, as independent
+        members compressed on `nproc` threads when `nproc` > 1"""
+        if lvl is None : lvl = self.lvl
+        if not compress or self.codec == Codec.NONE :
+            yield from blocks
+        elif nproc > 1 :
+            yield from self.compressMembers(blocks, lvl, nproc)
+        else :
+            z = Codec.compressor(self.codec, lvl)
+            for data in blocks :
+                data = z.compress(data)
+                if data : yield data
+            yield z.flush()
+
+
+    @Log()
+    def compressMembers(self, blocks, lvl=9, nproc=2):
+        """Generator of a multi-member stream (pigz like). `blocks` are
+        gathered in BLOCK_SIZE members compressed on a pool of `nproc`
+        threads (zlib, lzma and bz2 release the GIL), members are yielded
+        in order with at most 2*`nproc` members in flight"""
+        pending, buf, size = deque(), [], 0
+        with ThreadPoolExecutor(nproc) as pool :
+            for data in blocks :
+                buf.append(data)
+                size += len(data)
+                if size >= self.BLOCK_SIZE :
+                    pending.append(pool.submit(self.compressMember, b''.join(buf), lvl))
+                    buf, size = [], 0
+                if len(pending) >= 2*nproc :
+                    yield pending.popleft().result()
+            if size > 0 or not pending :
+                pending.append(pool.submit(self.compressMember, b''.join(buf), lvl))
+            while pending :
+                yield pending.popleft().result()
+
+
+    @Log(Const.LOG_DEBUG)
+    def compressMember(self, data, lvl=9):
+        """Compress `data` as a complete member of the codec
+        :Returns: `bytes`
+        """
+        z = Codec.compressor(self.codec, lvl)
+        return z.compress(data) + z.flush()
+
+
+    @Log()
+    def uncompressBlocks(self, blocks, decompress=True):
+        """Generator of uncompressed `blocks`, members of a multi-member
+        stream are uncompressed one after the other"""
+        if not decompress or self.codec == Codec.NONE :
+            yield from blocks
+        elif self.codec == Codec.ZLIB :
+            z = Codec.decompressor(self.codec)
+            for data in blocks :
+                while data :
+                    udata = z.decompress(data, self.BLOCK_SIZE)
+                    if udata : yield udata
+                    if z.eof :
+                        data, z = z.unused_data, Codec.decompressor(self.codec)
+                    else :
+                        data = z.unconsumed_tail
+            yield z.flush()
+        else :
+            z = Codec.decompressor(self.codec)
+            for data in blocks :
+                while True :
+                    udata = z.decompress(data, self.BLOCK_SIZE)
+                    if udata : yield udata
+                    if z.eof :
+                        data, z = z.unused_data, Codec.decompressor(self.codec)
+                        if not data : break
+                    elif z.needs_input : break
+                    else : data = b''
+
+
+    @Log()
+    def encodeBlocks(self, blocks):
+        """Generator of base64 encoded `blocks` (compress_start of the char
+        cipher), ending with a newline like b2a_base64"""
+        rest = b''
+        for data in blocks :
+            data = rest + data
+            l    = len(data) - len(data) % 3
+            data, rest = data[:l], data[l:]
+            if data : yield b2a_base64(data, newline=False)
+        yield b2a_base64(rest)
+
+
+    @Log()
+    def decodeBlocks(self, blocks):
+        """Generator of base64 decoded `blocks`"""
+        rest = b''
+        for data in blocks :
+            data = rest + data.replace(b'\n', b'')
+            l    = len(data) - len(data) % 4
+            data, rest = data[:l], data[l:]
+            if data : yield a2b_base64(data)
+        if rest : yield a2b_base64(rest)
+
+
+    @Log(Const.LOG_DEBUG)
+    def cipherChars(self, s, i=0, decrypt=False):
+        """Apply the char cipher on str `s` starting at key indice `i`
+        :Returns: `str`
+        """
+        if self.engine == self.ENGINE_NUMPY :
+            return self.cipherCharsVect(s, i, decrypt)
+        adata, lk, key = [], len(self.key), self.key
+        for c in s :
+            if i >= lk : i = 0
+            c = ord(c)
+            if not decrypt :
+                adata.append(chr(c + i//4 + (key[i] if c + key[i] + i//4 < 11000 else -key[i])))
+            else :
+                adata.append(chr(c - i//4 + (-key[i] if c + key[i] + i//4 < 110000 else key[i])))
+            i += 1
+        return ''.join(adata)
+
+
+    @Log(Const.LOG_DEBUG)
+    def cipherBlock(self, data, i=0, decrypt=False):
+        """Cipher a block `data` (bytes in byte mode, str in char mode)
+        starting at key indice `i`
+        :Returns: `bytes`
+        """
+        if self.bytemode :
+            return self.cipherBytes(data, i, decrypt)
+        return self.cipherChars(data, i, decrypt).encode('utf-8', 'surrogatepass')
+
+
+    @Log()
+    def cipherBlocksMproc(self, blocks, pool, nproc, decrypt=False, i=0):
+        """Generator of ciphered `blocks` dispatched on `pool`. blocks are
+        yielded in order, with at most 2*`nproc` blocks in flight"""
+        lk, pending = len(self.key), deque()
+        dec = None if self.bytemode else getincrementaldecoder('utf-8')()
+        for data in blocks :
+            if dec is not None : data = dec.decode(data)
+            pending.append(pool.apply_async(_mproc_cipher_block, (data, i, decrypt)))
+            i = (i + len(data)) % lk
+            if len(pending) >= 2*nproc :
+                yield pending.popleft().get()
+        while pending :
+            yield pending.popleft().get()
+        if dec is not None : dec.decode(b'', True)
+
+
+    @Log()
+    def cipherStage(self, blocks, pool=None, nproc=1, decrypt=False):
+        """Generator of ciphered `blocks`, on `pool` if any"""
+        if pool is None :
+            return self.cipherBlocks(blocks, decrypt)
+        return self.cipherBlocksMproc(blocks, pool, nproc, decrypt)
+
+
+    @Log()
+    def getPool(self, nproc):
+        """Get a pool of `nproc` forked workers sharing this instance, it
+        must be created before any stage thread is started
+        :Returns: `multiprocessing.pool.Pool`
+        """
+        global _mproc_km
+        _mproc_km = self
+        return get_context('fork').Pool(nproc)
+
+
+    @Log()
+    def pipeBlocks(self, blocks, nproc=2):
+        """Run the stage `blocks` in its own thread when `nproc` > 1,
+        blocks are handed to the next stage through a bounded queue of
+        PIPE_SIZE blocks. zlib, hashlib and file I/O release the GIL, so
+        chained stages overlap
+        """
+        if nproc < 2 :
+            yield from blocks
+            return
+        q, stop, end = Queue(self.PIPE_SIZE), Event(), object()
+        def put(item):
+            while not stop.is_set() :
+                try :
+                    q.put(item, timeout=0.1)
+                    break
+                except Full : pass
+        def produce():
+            try :
+                for data in blocks :
+                    if stop.is_set() : return
+                    put((data, None))
+                put((end, None))
+            except BaseException as e :
+                put((end, e))
+        t = Thread(target=produce, daemon=True)
+        t.start()
+        try :
+            while True :
+                data, e = q.get()
+                if data is end :
+                    if e is not None : raise e
+                    break
+                yield data
+        finally :
+            stop.set()
+            t.join()
+
+
+    @Log()
+    def cipherBlocks(self, blocks, decrypt=False, i=0):
+        """Generator of ciphered `blocks` (encryptToFile / decryptToFile)"""
+        lk = len(self.key)
+        if self.bytemode :
+            for data in blocks :
+                yield self.cipherBytes(data, i, decrypt)
+                i = (i + len(data)) % lk
+        else :
+            dec = getincrementaldecoder('utf-8')()
+            for data in blocks :
+                s = dec.decode(data)
+                yield self.cipherBlock(s, i, decrypt)
+                i = (i + len(s)) % lk
+            dec.decode(b'', True)
+
+
+    @Log()
+    def encrypt_stream(self, fromPath, toPath, header=None, nproc=1, emit=True):
+        """Single pass alternative of encrypt_sp_start, encrypt_mproc and
+        encrypt_sp_end. stages are chained as generators of BLOCK_SIZE
+        blocks, a temp file is only written before random and mix modes
+        which need a random access on their input. with `nproc` > 1 each
+        stage runs concurrently, the cipher is done by a process pool and
+        parts of mix mode (not fused) are read ahead by a thread pool"""
+        if not Sys.is_cli_cancel():
+            if header is not None :
+                self.kh = header
+            for k in ('k', 'p') : self.kh.ext.pop(k, None)
+            fsize = Sys.getsize(fromPath)
+            if fsize > 0 :
+                decHeader     = self.kh.readHeader(self.kh.buildHeader(fsize))
+                self.useHeader(decHeader)
+                self.tmpPath1 = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp'
+                self.tmpPath2 = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp2'
+                self.iostat   = {}
+                compend, compstart = not decHeader['cmode']== KirmahHeader.COMP_NONE, decHeader['cmode']== KirmahHeader.COMP_ALL
+                rmode, mmode       = decHeader['rmode'], decHeader['mmode']
+                if emit : Sys.cli_emit_progress(2)
+                d = Sys.datetime.now()
+                if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                Sys.ptask('Encrypting data (stream)')
+                pool = self.getPool(nproc) if nproc > 1 else None
+                try :
+                    blocks = self.pipeBlocks(self.readBlocks(fromPath), nproc)
+                    blocks = self.pipeBlocks(self.compressBlocks(blocks, compstart, nproc=nproc), nproc)
+                    if not self.bytemode : blocks = self.encodeBlocks(blocks)
+                    blocks = self.countBlocks(self.cipherStage(self.countBlocks(blocks, 'start'), pool, nproc), 'cipher')
+                    if rmode or mmode :
+                        fp = self.spillBlocks(blocks, self.tmpPath1)
+                        if emit : Sys.cli_emit_progress(50)
+                        fuse = rmode and mmode and self.canFuse(fp)
+                        if rmode and not fuse :
+                            self.randomFileContent(fp, self.tmpPath2, emit=emit)
+                            fp = self.tmpPath2
+                            self.iostat['spill'] += self.iostat['cipher']
+                        if emit : Sys.cli_emit_progress(75)
+                        if fuse :
+                            blocks = self.countBlocks(self.randomMixBlocks(fp, self.getRandomSizes(fp), True, cpart=self.getMixParts(Sys.getsize(fp))), 'mix')
+                        elif mmode and nproc > 1 :
+                            blocks = self.countBlocks(self.readParts(fp, self.getMixRanges(Sys.getsize(fp), True, cpart=self.getMixParts(Sys.getsize(fp))), nproc), 'mix')
+                        else :
+                            blocks = self.countBlocks(self.mixBlocks(fp, True, cpart=self.getMixParts(Sys.getsize(fp))), 'mix') if mmode else self.readBlocks(fp)
+                    self.writeKmh(self.pipeBlocks(blocks, nproc), toPath, compend, nproc=nproc)
+                finally :
+                    if pool is not None : pool.terminate()
+                if emit : Sys.cli_emit_progress(95)
+                for path in (self.tmpPath1, self.tmpPath2) :
+                    if Io.file_exists(path) : Sys.removeFile(path)
+                # legacy stages write then read a temp file on each step
+                legacy = 2*(self.iostat['start'] + self.iostat['cipher']*(2 if rmode else 1) + self.iostat.get('mix', 0))
+                if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                Sys.pstep('Encrypt data (stream - '+readable_size(legacy - 2*self.iostat.get('spill', 0))+' of temp I/O saved)', d, True)
+                if emit : Sys.cli_emit_progress(97)
+
+
+    @Log()
+    def writeKmh(self, blocks, toPath, compress=True, lvl=None, nproc=1):
+        """Stream alternative of compress_end. the header depends on data
+        length, so it is written once all blocks are written"""
+        if not Sys.is_cli_cancel():
+            with Io.wfile(toPath) as fo :
+                fo.write(b' '*self.kh.getLength())
+                dlen = 0
+                for data in self.compressBlocks(blocks, compress, lvl, nproc):
+                    fo.write(data)
+                    dlen += len(data)
+                fo.seek(0)
+                fo.write(self.kh.buildHeader(dlen))
+
+
+    @Log()
+    def encryptBytes(self, data, header=None):
+        """In memory alternative of encrypt_stream for small `data` like
+        the kcf, stages are chained on a buffer so nothing is written
+        :Returns: `bytes`
+        """
+        if not Sys.is_cli_cancel():
+            if header is not None :
+                self.kh = header
+            for k in ('k', 'p') : self.kh.ext.pop(k, None)
+            decHeader = self.kh.readHeader(self.kh.buildHeader(len(data)))
+            self.useHeader(decHeader)
+            compend, compstart = not decHeader['cmode']== KirmahHeader.COMP_NONE, decHeader['cmode']== KirmahHeader.COMP_ALL
+            rmode, mmode       = decHeader['rmode'], decHeader['mmode']
+            blocks = self.compressBlocks([data], compstart)
+            if not self.bytemode : blocks = self.encodeBlocks(blocks)
+            data   = b''.join(self.cipherBlocks(blocks))
+            if rmode or mmode :
+                fsize   = len(data)
+                slices  = [(start, end, True) for start, end in self.getRandomSlices(*self.getRandomChunkSizes(fsize))] if rmode else [(0, fsize, False)]
+                blocks  = self.mixSlices(data, fsize, slices, True, cpart=self.getMixParts(fsize)) if mmode else self.moveBlocks(data, slices)
+                data    = b''.join(blocks)
+            data = b''.join(self.compressBlocks([data], compend))
+            return self.kh.buildHeader(len(data)) + data
+
+
+    @Log()
+    def decrypt_stream(self, fromPath, toPath, nproc=1, emit=True):
+        """Single pass alternative of decrypt_sp_start, decrypt_mproc and
+        decrypt_sp_end. with `nproc` > 1 parts of mix mode (without random
+        mode) are read ahead by a thread pool"""
+        if not Sys.is_cli_cancel():
+            fsize = Sys.getsize(fromPath)
+            if fsize > 0 :
+                self.tmpPath1 = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp'
+                self.tmpPath2 = self.DIR_TEMP + Sys.basename(fromPath) + '.tmp2'
+                self.iostat   = {}
+                d = Sys.datetime.now()
+                if emit : Sys.cli_emit_progress(1)
+                with Io.rfile(fromPath) as f :
+                    decHeader = self.kh.readHeader(f.read(self.kh.HEAD_MAX))
+                if len(decHeader) > 0 :
+                    self.useHeader(decHeader)
+                    fsize -= decHeader['hlen']
+                    if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                    if decHeader['smode'] == self.mark[fsize%len(self.mark)] :
+                        Sys.pstep('Reading Header', d, True)
+                    else :
+                        Sys.pstep('Reading Header', d, False, False, False)
+                        raise BadKeyException('wrong key')
+
+                compend, compstart = not decHeader['cmode']== KirmahHeader.COMP_NONE, decHeader['cmode']== KirmahHeader.COMP_ALL
+                rmode, mmode       = decHeader['rmode'], decHeader['mmode']
+                fp, offset, blocks = fromPath, decHeader['hlen'], None
+                d = Sys.datetime.now()
+                if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                Sys.ptask('Decrypting data (stream)')
+                if emit : Sys.cli_emit_progress(3)
+                pool = self.getPool(nproc) if nproc > 1 else None
+                try :
+                    if compend and (rmode or mmode) :
+                        blocks     = self.pipeBlocks(self.readBlocks(fp, offset), nproc)
+                        fp, offset = self.spillBlocks(self.uncompressBlocks(blocks), self.tmpPath1), 0
+                        fsize      = self.iostat['spill']
+                    fuse = rmode and mmode and self.canFuse(fp, offset)
+                    if fuse :
+                        blocks = self.countBlocks(self.unmixRandomBlocks(fp, offset, cpart=self.getHeadMixParts()), 'mix')
+                    elif mmode and rmode :
+                        # unmixed data is spilled for random mode, parts are copied
+                        dlen = self.unmixdata(fp, self.tmpPath2, cpart=self.getHeadMixParts(), nproc=nproc, offset=offset, emit=emit)
+                        fp, offset = self.tmpPath2, 0
+                        self.iostat['mix'], self.iostat['spill'] = dlen, self.iostat.get('spill', 0) + dlen
+                    elif mmode and nproc > 1 :
+                        slices = self.getUnmixSlices(Sys.getsize(fp)-offset, cpart=self.getHeadMixParts())[0]
+                        blocks = self.countBlocks(self.readParts(fp, [(start, end-start) for start, end in slices], nproc, offset), 'mix')
+                    elif mmode :
+                        blocks = self.countBlocks(self.unmixBlocks(fp, offset, cpart=self.getHeadMixParts()), 'mix')
+                    if emit : Sys.cli_emit_progress(20)
+                    if rmode and not fuse :
+                        blocks = self.unRandomBlocks(fp, offset)
+                    if blocks is None :
+                        blocks = self.pipeBlocks(self.readBlocks(fp, offset), nproc)
+                        blocks = self.countBlocks(self.uncompressBlocks(blocks, compend), 'end')
+                    blocks = self.pipeBlocks(blocks, nproc)
+                    blocks = self.countBlocks(self.cipherStage(blocks, pool, nproc, True), 'cipher')
+                    if not self.bytemode : blocks = self.decodeBlocks(blocks)
+                    self.writeBlocks(self.pipeBlocks(self.uncompressBlocks(blocks, compstart), nproc), toPath)
+                finally :
+                    if pool is not None : pool.terminate()
+                if emit : Sys.cli_emit_progress(95)
+                for path in (self.tmpPath1, self.tmpPath2) :
+                    if Io.file_exists(path) : Sys.removeFile(path)
+                # legacy stages write then read a temp file on each step
+                fsize  = self.iostat.get('end', fsize)
+                legacy = 2*(fsize + self.iostat.get('mix', 0) + (self.iostat.get('mix', fsize) if rmode else 0) + self.iostat['cipher'])
+                if Sys.g.DEBUG : Sys.wlog(Sys.dprint())
+                Sys.pstep('Decrypt data (stream - '+readable_size(legacy - 2*self.iostat.get('spill', 0))+' of temp I/O saved)', d, True)
+                if emit : Sys.cli_emit_progress(97)
+
+
     @Log(Const.LOG_DEBUG)
     def offuscate(self, data, index):
         """"""
@@ -1058,9 +2571,20 @@ class Kirmah:
 
     @staticmethod
     @Log(Const.LOG_DEBUG)
-    def getSizes(fromPath):
+    def getSizes(fromPath, offset=0, chsize=None):
         #~ if not Sys.is_cli_cancel():
-        fsize  = Sys.getsize(fromPath)
+        return Kirmah.getChunkSizes(Sys.getsize(fromPath)-offset, chsize)
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def getChunkSizes(fsize, chsize=None):
+        """Get sizes of random mode of `fsize` bytes, with the legacy table
+        if `chsize` is not given
+        :Returns: `tuple`
+        """
+        if chsize is not None :
+            return fsize, chsize, ceil(fsize/chsize)
         s      = (22,44,122,444,1222,14444,52222,244444,522222,1444444)
         a      = (2,3,7,9,21,33,87,151,427)
         m, g   = 4000, 3
@@ -1080,31 +2604,93 @@ class Kirmah:
         return fsize, chsize, ceil(fsize/chsize)
 
 
+    @staticmethod
+    @Log()
+    def getAlignedSizes(fromPath, offset=0, count=None):
+        """Get sizes of the aligned chunk policy : about `count` chunks
+        (CHUNK_COUNT) of a PAGE_SIZE multiple, or of a power of two for
+        files smaller than `count` pages
+        :Returns: `tuple`
+        """
+        return Kirmah.getAlignedChunkSizes(Sys.getsize(fromPath)-offset, count)
+
+
+    @staticmethod
+    @Log(Const.LOG_DEBUG)
+    def getAlignedChunkSizes(fsize, count=None):
+        """Get sizes of the aligned chunk policy of `fsize` bytes
+        :Returns: `tuple`
+        """
+        target = max(1, ceil(fsize/(Kirmah.CHUNK_COUNT if count is None else count)))
+        if target >= Kirmah.PAGE_SIZE :
+            chsize = ceil(target/Kirmah.PAGE_SIZE)*Kirmah.PAGE_SIZE
+        else :
+            chsize = 1 << (target-1).bit_length()
+        return fsize, chsize, ceil(fsize/chsize)
+
+
+    @Log()
+    def getRandomSizes(self, fromPath):
+        """Get sizes of random mode according to chpolicy, the chunk size
+        of the aligned policy is recorded in the header extended field
+        :Returns: `tuple`
+        """
+        return self.getRandomChunkSizes(Sys.getsize(fromPath))
+
+
+    @Log()
+    def getRandomChunkSizes(self, fsize):
+        """Get sizes of random mode of `fsize` bytes according to chpolicy
+        :Returns: `tuple`
+        """
+        if self.chpolicy == self.CHUNK_ALIGNED :
+            fsize, chsize, size = Kirmah.getAlignedChunkSizes(fsize)
+            self.kh.ext['k']    = str(chsize)
+        else :
+            fsize, chsize, size = Kirmah.getChunkSizes(fsize)
+            self.kh.ext.pop('k', None)
+        return fsize, chsize, size
+
+
     @staticmethod
     @Log()
     def getRandomListFromKey(key, size):
-        """"""
+        """Get the permutation of `size` chunks of `key`. picked values are
+        also kept in a set for O(1) membership tests, the high and low
+        cursors only move forward so the whole build is O(size)
+        :Returns: `list`
+        """
         #~ if not Sys.is_cli_cancel():
-        j, ok, lk, r, ho, hr, lv, hv, rev = 0, False, len(key), None, [], [], 0, size-1, False
+        j, ok, lk, r, ho, hs, lv, hv, rev = 0, False, len(key), None, [], set(), 0, size-1, False
         for i in range(size) :
             if j >= lk : j = 0
             r  = key[j]
-            ok = r < size and not r in ho
+            ok = r < size and not r in hs
             if not ok:
                 r = hv if not rev else lv
-                while r in ho :
+                while r in hs :
                     r = r - 1 if not rev else r + 1
                     if r > size-1 : r = 0
                     elif r < 0 : r = size - 1
                 if not rev : hv = r
                 else : lv = r
-                ok = not r in ho
-            if ok : ho.append(r)
+                ok = not r in hs
+            if ok :
+                ho.append(r)
+                hs.add(r)
             j += 1
             rev = not rev
         return Kirmah.getSimulRandomList(ho, Kirmah.getSimulNumber(key, size//5 if not size//5==0 else size*2, size//10 if not size//10 ==0 else size))
 
 
+    @Log(Const.LOG_DEBUG)
+    def getPermutation(self, size):
+        """Get the (cached) chunks permutation of `size` chunks
+        :Returns: `list`
+        """
+        return CACHE.get(('rand', self.ck.kid, size), lambda : Kirmah.getRandomListFromKey(self.ck.key, size), self.ck.key)
+
+
     @staticmethod
     @Log(Const.LOG_DEBUG)
     def getSimulRandomList(lst, chsize):
@@ -1116,15 +2702,20 @@ class Kirmah:
     @staticmethod
     @Log(Const.LOG_PRIVATE)
     def _getSimulRandomList(lst, chsize):
-        """"""
+        """Interleave `lst` by steps of `chsize`. membership tests are done
+        on sets (`pos` is tested against values of `lst`, as it always was)
+        :Returns: `list`
+        """
         #~ if not Sys.is_cli_cancel():
         size, rlst, pos = len(lst), [], 0
         if chsize > 0 :
+            lset, rset = set(lst), set()
             for i in range(chsize+1):
                 for j in range(ceil(size/chsize)+1):
                     pos = j*chsize+i
-                    if pos in lst and not lst[pos] in rlst:
+                    if pos in lset and not lst[pos] in rset:
                         rlst.append(lst[pos])
+                        rset.add(lst[pos])
         else : rlst = lst
         return rlst
 
@@ -1172,9 +2763,15 @@ class Randomiz:
 
     @Log(Const.LOG_NEVER)
     def get(self,single=True):
-        """"""
-        pos = choice(self.lst)
-        if single: del self.lst[self.lst.index(pos)]
+        """Get a random item of the list, removed from it if `single`. the
+        last item is swapped in the picked slot so removal is O(1)
+        :Returns: `int`
+        """
+        if not single : return choice(self.lst)
+        i           = randrange(len(self.lst))
+        pos         = self.lst[i]
+        self.lst[i] = self.lst[-1]
+        self.lst.pop()
         return pos
 
 
@@ -1192,10 +2789,11 @@ class Noiser:
 
     @Log(Const.LOG_DEBUG)
     def build(self, part, vord=22):
-        """"""
-        if not part < len(self.key)-1 : raise Exception('part exceed limit')
+        """build noise lengths of `part`. key indices are wrapped beyond
+        len(key)-2 parts, so noise of smaller part counts is unchanged"""
+        if part < 0 : raise Exception('part exceed limit')
         else :
-            self.part, v = part, vord
+            self.part, v = part % (len(self.key)-2), vord
             v  = int(ceil((self.key[vord]+v)/4.20583))
             self.lns = abs(int(ceil(v/2))-self.key[self.part]+self.key[7])
             self.lne = abs(int(v-self.lns-self.key[self.part+2]-self.key[44]/2.1934))
@@ -1211,6 +2809,141 @@ class Noiser:
             n = str(n,'utf-8')
         return n[:l]
 
+    @Log(Const.LOG_DEBUG)
+    def getPool(self, l, b64encode=True, encrypt=None):
+        """Get a NoisePool of `l` bytes, encrypted by `encrypt` if given
+        :Returns: `NoisePool`
+        """
+        return NoisePool(self.getNoise(l, b64encode), encrypt)
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ class NoisePool ~~
+
+class NoisePool:
+    """Noise of a whole job from a single random buffer, handed out in
+    consecutive slices"""
+
+    @Log(Const.LOG_BUILD)
+    def __init__(self, data, encrypt=None):
+        """"""
+        # encrypted noise is at least as long as noise (multibyte chars)
+        self.data = encrypt(data) if encrypt is not None else data
+        self.pos  = 0
+
+    @Log(Const.LOG_DEBUG)
+    def get(self, l):
+        """Get the next `l` bytes of noise
+        :Returns: `bytes`
+        """
+        self.pos += l
+        return self.data[self.pos-l:self.pos]
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ class LruCache ~~
+
+class LruCache:
+    """Least recently used cache of key dependant lists (chunks permutations
+    and hash lists), with an optional on-disk store. disk entries are only
+    readable by the user and are named and checked with an hmac keyed by
+    the secret of their key, entries without secret stay in memory"""
+
+    @Log(Const.LOG_BUILD)
+    def __init__(self, size=64, path=None, dsize=256):
+        """"""
+        self.size  = size
+        self.dsize = dsize
+        self.data  = OrderedDict()
+        self.lock  = Lock()
+        self.hits  = 0
+        self.miss  = 0
+        self.setPath(path)
+
+
+    @Log(Const.LOG_DEBUG)
+    def setPath(self, path=None):
+        """Enable the on-disk store in directory `path` (None to disable)"""
+        if path is not None :
+            Sys.mkdir_p(path)
+            chmod(path, 0o700)
+            if path[-1] != Sys.sep : path += Sys.sep
+        self.path = path
+
+
+    @Log(Const.LOG_DEBUG)
+    def get(self, key, build, secret=None):
+        """Get value of `key`, calling `build` on a cache miss. the value is
+        stored on disk only with the `secret` (bytes) it derives from
+        :Returns: `object`
+        """
+        with self.lock :
+            if key in self.data :
+                self.data.move_to_end(key)
+                self.hits += 1
+                return self.data[key]
+        value = self.load(key, secret)
+        if value is None :
+            value = build()
+            self.save(key, value, secret)
+            self.miss += 1
+        else : self.hits += 1
+        with self.lock :
+            self.data[key] = value
+            while len(self.data) > self.size :
+                self.data.popitem(False)
+        return value
+
+
+    @Log(Const.LOG_DEBUG)
+    def getFile(self, key, secret):
+        """"""
+        return self.path + hmac(secret, Io.bytes(repr(key)), sha256).hexdigest()
+
+
+    @Log(Const.LOG_DEBUG)
+    def load(self, key, secret=None):
+        """Load `key` from disk, corrupted or forged entries are removed
+        :Returns: `object`
+        """
+        value = None
+        if self.path is not None and secret is not None and Io.file_exists(self.getFile(key, secret)) :
+            path = self.getFile(key, secret)
+            with Io.rfile(path) as f :
+                hd, data = f.readline().strip(), f.read()
+            try :
+                if compare_digest(hd, Io.bytes(hmac(secret, data, sha256).hexdigest())) :
+                    value = literal_eval(Io.str(data))
+            except (ValueError, SyntaxError) : pass
+            if value is None : Sys.removeFile(path)
+        return value
+
+
+    @Log(Const.LOG_DEBUG)
+    def save(self, key, value, secret=None):
+        """Save `key` on disk, evicting oldest entries above dsize"""
+        if self.path is not None and secret is not None :
+            data, path = Io.bytes(repr(value)), self.getFile(key, secret)
+            with Io.wfile(path) as f :
+                chmod(path, 0o600)
+                f.write(Io.bytes(hmac(secret, data, sha256).hexdigest())+b'\n'+data)
+            files = sorted([self.path+name for name in listdir(self.path)], key=getmtime)
+            for path in files[:max(0, len(files)-self.dsize)] :
+                Sys.removeFile(path)
+
+
+    @Log(Const.LOG_DEBUG)
+    def getHitRate(self):
+        """
+        :Returns: `float`
+        """
+        return self.hits/(self.hits+self.miss) if self.hits+self.miss > 0 else 0.0
+
+
+CACHE = LruCache()
+"""shared cache of chunks permutations and hash lists"""
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+#  kirmah/tests/test_cache.py
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  software  : Kirmah    <http://kirmah.sourceforge.net/>
+#  version   : 2.18
+#  date      : 2013
+#  licence   : GPLv3.0   <http://www.gnu.org/licenses/>
+#  author    : a-Sansara <[a-sansara]at[clochardprod]dot[net]>
+#  copyright : pluie.org <http://www.pluie.org/>
+#
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  This file is part of Kirmah.
+#
+#  Kirmah is free software (free as in speech) : you can redistribute it
+#  and/or modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the License,
+#  or (at your option) any later version.
+#
+#  Kirmah is distributed in the hope that it will be useful, but WITHOUT
+#  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#  more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Kirmah.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ module tests.test_cache ~~
+
+import unittest
+from hashlib            import sha256
+from os                 import listdir, stat
+from os.path            import join
+from tempfile           import mkdtemp
+from shutil             import rmtree
+from kirmah.crypt       import LruCache
+
+
+class LruCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = mkdtemp()
+        self.dir = join(self.tmp, 'cache')
+
+    def tearDown(self):
+        rmtree(self.tmp, True)
+
+    def test_disk_store(self):
+        cache = LruCache(path=self.dir)
+        self.assertEqual(cache.get(('rand', 7), lambda : [3, 1, 2], b'secret'), [3, 1, 2])
+        cache.get(('rand', 8), lambda : [1, 2], None)
+        names = listdir(self.dir)
+        self.assertEqual(len(names), 1)
+        self.assertEqual(stat(self.dir).st_mode & 0o777, 0o700)
+        self.assertEqual(stat(join(self.dir, names[0])).st_mode & 0o777, 0o600)
+        self.assertEqual(LruCache(path=self.dir).get(('rand', 7), lambda : None, b'secret'), [3, 1, 2])
+
+    def test_forged_entry(self):
+        LruCache(path=self.dir).get(('rand', 7), lambda : [3, 1, 2], b'secret')
+        path = join(self.dir, listdir(self.dir)[0])
+        # an unkeyed digest of tampered content is rejected
+        data = b'[1, 2, 3]'
+        with open(path, 'wb') as f : f.write(sha256(data).hexdigest().encode()+b'\n'+data)
+        self.assertEqual(LruCache(path=self.dir).get(('rand', 7), lambda : [3, 1, 2], b'secret'), [3, 1, 2])
+        self.assertIsNone(LruCache(path=self.dir).load(('rand', 7), b'other'))
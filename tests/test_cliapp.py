@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+#  kirmah/tests/test_cliapp.py
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  software  : Kirmah    <http://kirmah.sourceforge.net/>
+#  version   : 2.18
+#  date      : 2013
+#  licence   : GPLv3.0   <http://www.gnu.org/licenses/>
+#  author    : a-Sansara <[a-sansara]at[clochardprod]dot[net]>
+#  copyright : pluie.org <http://www.pluie.org/>
+#
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  This file is part of Kirmah.
+#
+#  Kirmah is free software (free as in speech) : you can redistribute it
+#  and/or modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the License,
+#  or (at your option) any later version.
+#
+#  Kirmah is distributed in the hope that it will be useful, but WITHOUT
+#  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#  more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Kirmah.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ module tests.test_cliapp ~~
+
+import unittest
+from optparse           import Values
+from os                 import chdir, getcwd, urandom
+from tempfile           import mkdtemp
+from shutil             import rmtree
+from unittest.mock      import patch
+from psr.sys            import Sys, Const, init
+from kirmah.crypt       import Kirmah, KeyGen
+from kirmah.cliapp      import CliApp
+import kirmah.conf      as conf
+
+
+class Parser:
+    """Parser of CliApp without output"""
+
+    def print_header(self):
+        pass
+
+    def error_cmd(self, data, pusage=False):
+        raise ValueError(data)
+
+
+class CliAppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd, self.tmp = getcwd(), mkdtemp()
+        chdir(self.tmp)
+        init(conf.PRG_NAME, False, False, False, Const.LOG_DEFAULT)
+        Sys.g.QUIET = True
+        with open('.key', 'w') as f : f.write(KeyGen(1024).key)
+
+    def tearDown(self):
+        chdir(self.cwd)
+        rmtree(self.tmp, True)
+
+    def getApp(self, cmd, path, **kwargs):
+        o = dict.fromkeys(('outputfile', 'compress', 'fullcompress', 'nocompress', 'random', 'norandom', 'mix', 'nomix',
+                           'multiprocess', 'engine', 'bytemode', 'codec', 'membudget', 'chunkpolicy', 'force'))
+        o.update(keyfile='.key', force=True, **kwargs)
+        return CliApp(self.tmp+Sys.sep, self.tmp, Parser(), [cmd, path], Values(o))
+
+    def test_enc_mix_multiprocess(self):
+        # -j reads parts of mix mode concurrently on the stream path, without temp file
+        with open('file.bin', 'wb') as f : f.write(urandom(1100001))
+        for options, spill in (({'norandom': True}, 0), ({'membudget': '1M'}, 1)) :
+            with patch.object(Kirmah, 'readParts', autospec=True, side_effect=Kirmah.readParts) as readParts, \
+                 patch.object(Kirmah, 'writeParts', autospec=True, side_effect=Kirmah.writeParts) as writeParts :
+                self.getApp('enc', 'file.bin', outputfile='file.kmh', multiprocess='2', engine='numpy', **options).onCommandEnc()
+                self.assertEqual((readParts.call_count, writeParts.call_count), (1, 0))
+                self.getApp('dec', 'file.kmh', outputfile='out.bin', multiprocess='2', engine='numpy', membudget=options.get('membudget')).onCommandDec()
+                # random mode - inv needs the unmixed data spilled
+                self.assertEqual((readParts.call_count, writeParts.call_count), (2-spill, spill))
+                self.assertTrue(all(call[0][3] == 2 for call in readParts.call_args_list))
+                self.assertTrue(all(call[0][4] == 2 for call in writeParts.call_args_list))
+            with open('file.bin', 'rb') as fi, open('out.bin', 'rb') as fo :
+                self.assertEqual(fi.read(), fo.read())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+#  kirmah/tests/test_crypt.py
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  software  : Kirmah    <http://kirmah.sourceforge.net/>
+#  version   : 2.18
+#  date      : 2013
+#  licence   : GPLv3.0   <http://www.gnu.org/licenses/>
+#  author    : a-Sansara <[a-sansara]at[clochardprod]dot[net]>
+#  copyright : pluie.org <http://www.pluie.org/>
+#
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  This file is part of Kirmah.
+#
+#  Kirmah is free software (free as in speech) : you can redistribute it
+#  and/or modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the License,
+#  or (at your option) any later version.
+#
+#  Kirmah is distributed in the hope that it will be useful, but WITHOUT
+#  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#  more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Kirmah.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ module tests.test_crypt ~~
+
+import unittest
+from os                 import chdir, getcwd, urandom
+from tempfile           import mkdtemp
+from shutil             import rmtree
+from kirmah.crypt       import Kirmah, KeyGen, KirmahHeader
+
+
+class CryptTest(unittest.TestCase):
+
+    def setUp(self):
+        self.key, self.cwd, self.tmp = KeyGen(1024).key, getcwd(), mkdtemp()
+        chdir(self.tmp)
+
+    def tearDown(self):
+        chdir(self.cwd)
+        rmtree(self.tmp, True)
+
+    def test_tiny_input_multiprocess(self):
+        # fewer bytes than processes
+        for size in (1, 2, 3) :
+            for cmode in (KirmahHeader.COMP_NONE, KirmahHeader.COMP_ALL, KirmahHeader.COMP_END) :
+                for bytemode in (True, False) :
+                    for stream in (True, False) :
+                        data = urandom(size)
+                        with open('file.bin', 'wb') as f : f.write(data)
+                        km        = Kirmah(self.key, None, cmode, bytemode=bytemode)
+                        km.stream = stream
+                        km.encrypt('file.bin', 'file.kmh', 2, emit=False)
+                        km        = Kirmah(self.key)
+                        km.stream = stream
+                        km.decrypt('file.kmh', 'out.bin', 2, emit=False)
+                        with open('out.bin', 'rb') as f : self.assertEqual(f.read(), data, (size, cmode, bytemode, stream))
+
+    def test_small_bytemode_mix_parts(self):
+        # byte mode mixes small files on fewer parts, char mode keeps the legacy count
+        data = urandom(300000)
+        with open('file.bin', 'wb') as f : f.write(data)
+        for bytemode, cpart in ((True, Kirmah.MIX_PARTS_MIN), (False, Kirmah.MIX_PARTS)) :
+            for stream in (True, False) :
+                km        = Kirmah(self.key, bytemode=bytemode)
+                km.stream = stream
+                km.encrypt('file.bin', 'file.kmh', emit=False)
+                km        = Kirmah(self.key)
+                km.stream = stream
+                km.decrypt('file.kmh', 'out.bin', emit=False)
+                self.assertEqual(km.getHeadMixParts(), cpart, (bytemode, stream))
+                with open('out.bin', 'rb') as f : self.assertEqual(f.read(), data, (bytemode, stream))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+#-*- coding: utf-8 -*-
+#  kirmah/tests/test_split.py
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  software  : Kirmah    <http://kirmah.sourceforge.net/>
+#  version   : 2.18
+#  date      : 2013
+#  licence   : GPLv3.0   <http://www.gnu.org/licenses/>
+#  author    : a-Sansara <[a-sansara]at[clochardprod]dot[net]>
+#  copyright : pluie.org <http://www.pluie.org/>
+#
+#  # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+#
+#  This file is part of Kirmah.
+#
+#  Kirmah is free software (free as in speech) : you can redistribute it
+#  and/or modify it under the terms of the GNU General Public License as
+#  published by the Free Software Foundation, either version 3 of the License,
+#  or (at your option) any later version.
+#
+#  Kirmah is distributed in the hope that it will be useful, but WITHOUT
+#  ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+#  FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public License for
+#  more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Kirmah.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~ module tests.test_split ~~
+
+import unittest
+import tarfile
+from os                 import chdir, getcwd, urandom, listdir, remove
+from tempfile           import mkdtemp
+from time               import perf_counter
+from unittest.mock      import patch
+from shutil             import rmtree
+from kirmah.crypt       import Kirmah, KeyGen
+
+
+class SplitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.key, self.cwd, self.tmp = KeyGen(1024).key, getcwd(), mkdtemp()
+        chdir(self.tmp)
+
+    def tearDown(self):
+        chdir(self.cwd)
+        rmtree(self.tmp, True)
+
+    def hashListTime(self, count):
+        t = perf_counter()
+        hlst = Kirmah(self.key).ck.getHashList('file%d.bin' % count, count, True)
+        t = perf_counter() - t
+        self.assertEqual(sorted(row[4] for row in hlst['data']), list(range(count)))
+        self.assertEqual(len(set(row[1] for row in hlst['data'])), count)
+        return t
+
+    def mkFile(self, size):
+        with open('file.bin', 'wb') as f : f.write(urandom(size))
+        with open('file.bin', 'rb') as f : return f.read()
+
+    def test_merge_small_file(self):
+        # fewer bytes than parts : only the first parts hold data
+        for size, count in ((50, 30), (100, 30), (5000, 62)) :
+            for nproc in (1, 2) :
+                data = self.mkFile(size)
+                kcf  = Kirmah(self.key).splitFile('file.bin', Kirmah(self.key).ck.getHashList('file.bin', count, True), nproc)
+                self.assertEqual(len(listdir('.')), Kirmah(self.key).getPartCount(size, -(-size//count))+2)
+                Kirmah(self.key).mergeFile(kcf, 'out.bin', nproc=nproc)
+                with open('out.bin', 'rb') as f : self.assertEqual(f.read(), data)
+                self.assertEqual(sorted(listdir('.')), ['file.bin', 'out.bin'])
+                remove('out.bin')
+
+    def test_merge_small_tar(self):
+        for size, count in ((50, 30), (100, 30), (5000, 62)) :
+            for nproc in (1, 2) :
+                data = self.mkFile(size)
+                # the kcf is encrypted in memory
+                with patch.object(Kirmah, 'encrypt', side_effect=AssertionError('kcf written')) :
+                    Kirmah(self.key).splitTar('file.bin', Kirmah(self.key).ck.getHashList('file.bin', count, True), 'file.tark', nproc)
+                # the index of parts is in the kcf, older versions extract no other member
+                with tarfile.open('file.tark') as tar : names = tar.getnames()
+                self.assertTrue(names[-1].endswith('.kcf'))
+                self.assertTrue(all(name.endswith(Kirmah.EXT) for name in names[:-1]))
+                km   = Kirmah(self.key)
+                out  = km.mergeTar('file.tark', 'out.bin', nproc=nproc)
+                self.assertEqual(len(km.tarIndex), len(names)-1)
+                with open(out, 'rb') as f : self.assertEqual(f.read(), data)
+                self.assertEqual(sorted(listdir('.')), ['file.bin', 'file.tark', 'out.bin'])
+                remove(out)
+
+    def test_merge_tar_failure(self):
+        # the kcf written for the merge is removed on failure
+        self.mkFile(5000)
+        Kirmah(self.key).splitTar('file.bin', Kirmah(self.key).ck.getHashList('file.bin', 22, True), 'file.tark')
+        with patch.object(Kirmah, 'merge', side_effect=OSError('merge failed')) :
+            with self.assertRaises(OSError) :
+                Kirmah(self.key).mergeTar('file.tark', 'out.bin')
+        self.assertEqual(sorted(listdir('.')), ['file.bin', 'file.tark'])
+
+    def test_hash_list_large_count(self):
+        # linear build : 8 times more parts must not cost 64 times more
+        small, large = self.hashListTime(25000), self.hashListTime(200000)
+        self.assertLess(large, small*24)